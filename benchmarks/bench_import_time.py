@@ -0,0 +1,123 @@
+"""以 python -X importtime 測量各命令列入口的載入時間，超過門檻時回傳錯誤碼
+
+用法: python benchmarks/bench_import_time.py [--repeat 5] [--slack 1.5] [--top 5]
+
+每個情境在新的直譯器中執行多次，取載入時間 (不含直譯器本身的 site/encodings) 的中位數，與各情境的上限比較。
+除了時間門檻，也檢查 --help、dry run 與只爬取排行榜等路徑沒有載入不需要的大型套件
+(Google API 客戶端、OAuth、yt-dlp)，避免之後的修改又把它們放回模組頂層。
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+
+from fake_servers import FakeMelonServer
+from melon_fixture import build_chart_html
+
+# 直譯器啟動時本來就會載入的模組，不計入
+STARTUP_MODULES = ('site', 'encodings', 'zipimport', '_frozen_importlib_external', 'codecs', 'io', 'abc')
+# 這些路徑不應該載入的套件 (前綴比對)
+GOOGLE_CLIENT = ['googleapiclient.discovery', 'googleapiclient.http', 'google_auth_oauthlib',
+                 'google.oauth2', 'google.auth.transport', 'httplib2', 'yt_dlp']
+# 各情境的載入時間上限 (毫秒)；原本 --help 需要約 500 ms
+HELP_BUDGET = 150
+SCRAPE_BUDGET = 250
+
+
+def parse_importtime(stderr):
+    """回傳 (頂層模組的載入時間 {名稱: 微秒}, 所有載入的模組名稱)"""
+    top_level = {}
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: 自身 | 累計 | 模組名稱"
+        _, cumulative, name = line.split('|')
+        modules.add(name.strip())
+        # 頂層模組的名稱前只有一個空白，子模組依層級縮排
+        if not name.startswith('  ') and name.strip() not in STARTUP_MODULES:
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules
+
+
+def measure(argv, cwd, repeat):
+    """執行 repeat 次，回傳 (載入時間中位數 ms, 最後一次的頂層模組時間, 載入的模組)"""
+    totals = []
+    top_level, modules = {}, set()
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(argv)} 執行失敗:\n{result.stderr[-2000:]}")
+        top_level, modules = parse_importtime(result.stderr)
+        totals.append(sum(top_level.values()) / 1000)
+    return statistics.median(totals), top_level, modules
+
+
+def scenarios(tmp, melon_url):
+    txt_file = os.path.join(tmp, 'songs.txt')
+    with open(txt_file, 'w', encoding='utf-8') as f:
+        f.write("IU - Love wins all\nNewJeans - Ditto\n")
+    script = lambda name: os.path.join(ROOT_DIR, name)
+    no_stores = ['--no-cache', '--no-catalog']
+    return [
+        ('txt_playlist --help', [script('txt_playlist.py'), '--help'], HELP_BUDGET, GOOGLE_CLIENT),
+        ('create_yt_playlist --help', [script('create_yt_playlist.py'), '--help'], HELP_BUDGET,
+         GOOGLE_CLIENT),
+        ('manifest_playlist --help', [script('manifest_playlist.py'), '--help'], HELP_BUDGET,
+         GOOGLE_CLIENT),
+        ('melon_scraper --help', [script('melon_scraper.py'), '--help'], HELP_BUDGET,
+         GOOGLE_CLIENT + ['requests', 'bs4', 'lxml']),
+        ('playlist_client --help', [script('playlist_client.py'), '--help'], HELP_BUDGET,
+         GOOGLE_CLIENT + ['googleapiclient', 'requests']),
+        ('txt_playlist --dry-run', [script('txt_playlist.py'), txt_file, '--dry-run'] + no_stores,
+         HELP_BUDGET, GOOGLE_CLIENT),
+        ('txt_playlist --plan', [script('txt_playlist.py'), txt_file, '--plan'] + no_stores,
+         HELP_BUDGET, GOOGLE_CLIENT),
+        # 爬取本來就需要 requests 與解析器，但不需要 Google 客戶端
+        ('melon_scraper (只爬取)', [script('melon_scraper.py'), '--chart', melon_url,
+                                    '--no-cache', '--no-history'], SCRAPE_BUDGET, GOOGLE_CLIENT),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='命令列入口的載入時間基準測試')
+    parser.add_argument('--repeat', '-r', type=int, default=5, help='每個情境執行次數 (預設: 5)')
+    parser.add_argument('--slack', type=float, default=1.0,
+                        help='上限的倍數，較慢的機器可放寬 (預設: 1.0)')
+    parser.add_argument('--top', type=int, default=5, help='列出最耗時的頂層模組數量 (預設: 5)')
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeMelonServer(html=build_chart_html(size=100, filler=0)) as melon:
+        for name, argv, budget, forbidden in scenarios(tmp, melon.url()):
+            budget *= args.slack
+            median, top_level, modules = measure(argv, tmp, args.repeat)
+            loaded = sorted(module for module in modules
+                            if any(module == prefix or module.startswith(prefix + '.')
+                                   for prefix in forbidden))
+            ok = median <= budget and not loaded
+            print(f"{'OK ' if ok else 'NG '} {name:<28}{median:>8.1f} ms  (上限 {budget:.0f} ms)")
+            heaviest = sorted(top_level.items(), key=lambda item: -item[1])[:args.top]
+            print("      " + ', '.join(f"{module} {us / 1000:.1f}" for module, us in heaviest))
+            if median > budget:
+                failures.append(f"{name}: {median:.1f} ms 超過上限 {budget:.0f} ms")
+            if loaded:
+                failures.append(f"{name}: 載入了不需要的模組 {', '.join(loaded[:5])}")
+
+    if failures:
+        print("\n載入時間回歸:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\n所有情境都在上限以內，且沒有載入不需要的大型套件")
+
+
+if __name__ == '__main__':
+    main()
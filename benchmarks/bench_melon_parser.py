@@ -0,0 +1,74 @@
+"""比較 Melon 排行榜各解析器的結果與速度
+
+用法: python benchmarks/bench_melon_parser.py [--repeat 20]
+
+對 benchmarks/fixtures/ 中每個 HTML 檔案，先確認各解析器的結果與
+html.parser 完全相同 (不同時以非零狀態結束)，再比較平均解析時間。
+synthetic_ 開頭的是合成頁面，其他是以 melon_fixture.py --save 保存的實際頁面；
+實際頁面的腳本、廣告與標記比合成頁面多，速度比較應以實際頁面為準。
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import melon_scraper
+from melon_fixture import FIXTURE_DIR, is_synthetic, write_fixture
+
+BACKENDS = ['html.parser', 'strainer', 'lxml']
+
+
+def _parse_direct(html, backend):
+    """直接呼叫各解析器 (不經過失敗時改用 html.parser 的邏輯)"""
+    if backend == 'lxml':
+        return melon_scraper._parse_with_lxml(html)
+    if backend == 'strainer':
+        return melon_scraper._parse_with_strainer(html)
+    return melon_scraper.parse_melon_chart(html, 'html.parser')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Melon 排行榜解析器基準測試')
+    parser.add_argument('--repeat', '-r', type=int, default=20, help='每個解析器重複次數 (預設: 20)')
+    args = parser.parse_args()
+
+    fixtures = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    if not fixtures:
+        fixtures = [write_fixture()]
+
+    if all(is_synthetic(path) for path in fixtures):
+        print("注意: 沒有保存的實際 Melon 頁面，以下結果只反映合成頁面 "
+              "(可用 python benchmarks/melon_fixture.py --save daily 保存)")
+
+    backends = [b for b in BACKENDS if b != 'lxml' or melon_scraper.load_lxml() is not None]
+    failed = False
+
+    for path in fixtures:
+        with open(path, 'rb') as f:
+            html = f.read()
+        kind = '合成頁面' if is_synthetic(path) else '實際頁面'
+        print(f"\n{os.path.basename(path)} ({kind}, {len(html) / 1024:.0f} KB)")
+
+        expected = _parse_direct(html, 'html.parser')
+        baseline = None
+        for backend in backends:
+            songs = _parse_direct(html, backend)
+            if songs != expected:
+                print(f"  ✗ {backend}: 結果與 html.parser 不同 ({len(songs)} / {len(expected)} 首)")
+                failed = True
+                continue
+
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                _parse_direct(html, backend)
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            baseline = baseline or elapsed
+            print(f"  ✓ {backend:<12} {elapsed:8.2f} ms  ({baseline / elapsed:.1f}x)  {len(songs)} 首")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""以本機假 Melon 伺服器比較逐一爬取與連線池並行爬取
+
+用法: python benchmarks/bench_melon_scraper.py [--charts 8] [--latency 0.2]
+
+會確認每個排行榜都解析出完整歌曲、錯誤的網址會回報在該排行榜的結果中、
+有快取時再次爬取只收到 304，結果不正確時以非零狀態結束。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import melon_scraper
+from chart_cache import ChartCache
+from fake_servers import FakeMelonServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Melon 多排行榜爬取基準測試')
+    parser.add_argument('--charts', type=int, default=8, help='排行榜數量 (預設: 8)')
+    parser.add_argument('--latency', type=float, default=0.2, help='假伺服器每個請求的延遲秒數')
+    parser.add_argument('--workers', type=int, default=4, help='並行數量 (預設: 4)')
+    args = parser.parse_args()
+
+    with FakeMelonServer(latency=args.latency, etag=True) as server:
+        urls = [server.url(f'/chart/{i}/index.htm') for i in range(args.charts)]
+        expected = len(melon_scraper.parse_melon_chart(server.html))
+
+        # 原本的方式: 每次 requests.get 都建立新連線，逐一下載
+        start = time.perf_counter()
+        for url in urls:
+            response = requests.get(url, headers=melon_scraper.HEADERS)
+            melon_scraper.parse_melon_chart(response.content)
+        serial = time.perf_counter() - start
+        serial_connections = len(server.connections)
+        print(f"逐一爬取:   {serial:.2f} 秒, {serial_connections} 個連線")
+
+        server.connections.clear()
+        start = time.perf_counter()
+        results = melon_scraper.scrape_melon_charts(urls + urls + [server.url('/404')],
+                                                    max_workers=args.workers)
+        pooled = time.perf_counter() - start
+        print(f"連線池並行: {pooled:.2f} 秒, {len(server.connections)} 個連線"
+              f" ({len(results)} 個排行榜，重複的網址只爬一次)")
+
+        ok = all(len(results[url]['songs']) == expected and results[url]['error'] is None
+                 for url in urls)
+        ok = ok and results[server.url('/404')]['error'] is not None
+        ok = ok and len(server.connections) <= args.workers
+        print(f"速度提升: {serial / pooled:.1f}x")
+
+        # 條件式請求: 第二次爬取時頁面沒有改變，應全部為 304 且不需重新解析
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ChartCache(cache_dir)
+            melon_scraper.scrape_melon_charts(urls, max_workers=args.workers, cache=cache)
+            start = time.perf_counter()
+            cached = melon_scraper.scrape_melon_charts(urls, max_workers=args.workers, cache=cache)
+            print(f"快取再爬取: {time.perf_counter() - start:.2f} 秒, 304 回應 {cache.not_modified} 個")
+            ok = ok and cache.not_modified == len(urls)
+            ok = ok and all(cached[url]['songs'] == results[url]['songs'] for url in urls)
+        print("✓ 結果正確" if ok else "✗ 結果不正確")
+        sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
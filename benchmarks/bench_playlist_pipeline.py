@@ -0,0 +1,188 @@
+"""以本機替身伺服器端到端測量建立播放清單的效能 (不消耗真實配額)
+
+用法: python benchmarks/bench_playlist_pipeline.py [--source txt] [--tracks 100 1000 10000]
+          [--workers 4] [--batch-size 50] [--latency 0.02] [--error-rate 0.01]
+          [--quota 100000] [--output results.jsonl]
+
+假 YouTube API 伺服器 (與 txt 來源以外的假 Melon 伺服器) 在獨立的行程中執行，
+每個工作也在新的行程中執行，互不影響計時與記憶體量測。每個工作回報:
+- 每秒處理的歌曲數
+- 每首歌的 API 呼叫數與 HTTP 請求數 (批次請求算一次 HTTP 請求)
+- 行程的記憶體峰值 (ru_maxrss)
+指定 --output 時將結果附加為 JSON lines，方便比較不同版本的效能。
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.append(ROOT_DIR)
+
+
+def _serve(conn, options):
+    """在子行程中啟動替身伺服器，將網址傳回後持續服務直到被終止"""
+    from fake_servers import FakeMelonServer, FakeYouTubeServer
+    from melon_fixture import build_chart_html
+
+    youtube = FakeYouTubeServer(latency=options['latency'], error_rate=options['error_rate'],
+                                quota=options['quota']).start()
+    melon_urls = {}
+    servers = [youtube]
+    for size in options['melon_sizes']:
+        melon = FakeMelonServer(html=build_chart_html(size=size, filler=0)).start()
+        servers.append(melon)
+        melon_urls[size] = melon.url()
+    conn.send({'discovery_url': youtube.discovery_url, 'stats_url': youtube.base_url + '/_stats',
+               'melon_urls': melon_urls})
+    conn.recv()
+    for server in servers:
+        server.stop()
+
+
+def _write_txt(path, tracks):
+    from melon_fixture import load_sample_songs
+
+    songs = load_sample_songs()
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(tracks):
+            name, artists = songs[i % len(songs)]
+            f.write(f"{artists[0]} - {name} {i}\n")
+
+
+def _run_job(conn, source, tracks, urls, options):
+    """在子行程中執行一次完整的工作，回傳耗時與記憶體峰值"""
+    from google.oauth2.credentials import Credentials
+
+    from quota import QuotaMeter
+    from rate_limiter import RateLimiter
+    from retry_policy import RetryPolicy
+    from youtube_auth import build_youtube_client
+
+    class NoFallback:
+        available = False
+
+        def close(self):
+            pass
+
+    settings = dict(cache=None, catalog=None, limiter=RateLimiter(options['rate']),
+                    workers=options['workers'],
+                    retry=RetryPolicy(base_delay=0.05, max_delay=0.5),
+                    quota=QuotaMeter(None, daily_limit=options['quota'] or 10 ** 12),
+                    ytdlp=NoFallback(), quiet=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        if source == 'txt':
+            from txt_playlist import TxtToYouTubePlaylist
+            path = os.path.join(tmp, 'songs.txt')
+            _write_txt(path, tracks)
+            converter = TxtToYouTubePlaylist(**settings)
+            run = lambda: converter.create_playlist_from_txt(
+                path, playlist_name='bench', batch_size=options['batch_size'],
+                stream=options['stream'])
+        else:
+            from create_yt_playlist import MelonToYouTubePlaylist
+            converter = MelonToYouTubePlaylist(chart_url=urls['melon_urls'][tracks], **settings)
+            run = lambda: converter.create_playlist_from_melon(
+                playlist_name='bench', batch_size=options['batch_size'], limit=tracks)
+
+        converter._youtube = build_youtube_client(Credentials(token='bench'),
+                                                  urls['discovery_url'])
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    conn.send({'elapsed': elapsed, 'peak_rss_kb': peak, 'baseline_rss_kb': baseline})
+
+
+def _fetch_stats(url):
+    with urllib.request.urlopen(url) as response:
+        return json.load(response)
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='播放清單建立流程的端到端基準測試')
+    parser.add_argument('--source', choices=['txt', 'melon'], default='txt', help='歌曲來源 (預設: txt)')
+    parser.add_argument('--tracks', '-n', type=int, nargs='+', default=[100, 1000],
+                        help='每個工作的歌曲數量，可指定多個 (預設: 100 1000)')
+    parser.add_argument('--workers', '-w', type=int, default=4, help='並行搜索數量 (預設: 4)')
+    parser.add_argument('--batch-size', type=int, default=50, help='批次添加大小，0 為逐首添加 (預設: 50)')
+    parser.add_argument('--rate', type=float, default=0, help='每秒請求數上限，0 為不限速 (預設: 0)')
+    parser.add_argument('--stream', action='store_true', help='(txt) 以 --stream 模式讀取')
+    parser.add_argument('--latency', type=float, default=0.0, help='假 API 每個 HTTP 請求的延遲秒數')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='假 API 回傳 503 的機率')
+    parser.add_argument('--quota', type=int, help='假 API 的每日配額 (預設: 不限)')
+    parser.add_argument('--output', '-o', type=str, help='將結果附加到此 JSON lines 檔案')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    options = vars(args).copy()
+    options['melon_sizes'] = args.tracks if args.source == 'melon' else []
+    server_conn, child_conn = context.Pipe()
+    server = context.Process(target=_serve, args=(child_conn, options), daemon=True)
+    server.start()
+    urls = server_conn.recv()
+
+    revision = _git_revision()
+    results = []
+    print(f"{'歌曲數':>8}{'秒數':>10}{'首/秒':>10}{'API/首':>10}{'HTTP/首':>10}{'記憶體峰值':>12}")
+    try:
+        for tracks in args.tracks:
+            before = _fetch_stats(urls['stats_url'])
+            job_conn, child_conn = context.Pipe()
+            job = context.Process(target=_run_job,
+                                  args=(child_conn, args.source, tracks, urls, options))
+            job.start()
+            result = job_conn.recv()
+            job.join()
+            after = _fetch_stats(urls['stats_url'])
+
+            calls = {name: count - before['calls'].get(name, 0)
+                     for name, count in after['calls'].items()
+                     if count - before['calls'].get(name, 0)}
+            api_calls = sum(calls.values())
+            http_requests = after['http_requests'] - before['http_requests']
+            result.update({
+                'source': args.source, 'tracks': tracks, 'revision': revision,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'tracks_per_sec': tracks / result['elapsed'],
+                'api_calls': calls, 'api_calls_per_track': api_calls / tracks,
+                'http_requests_per_track': http_requests / tracks,
+                'quota_used': after['quota_used'] - before['quota_used'],
+                'options': {key: options[key] for key in
+                            ['workers', 'batch_size', 'rate', 'stream', 'latency', 'error_rate', 'quota']},
+            })
+            results.append(result)
+            print(f"{tracks:>8}{result['elapsed']:>10.2f}{result['tracks_per_sec']:>10.1f}"
+                  f"{result['api_calls_per_track']:>10.2f}{result['http_requests_per_track']:>10.2f}"
+                  f"{result['peak_rss_kb'] / 1024:>10.1f} MB")
+    finally:
+        server_conn.send('stop')
+        server.join(timeout=5)
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+        print(f"結果已附加到: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""比較 txt 歌曲列表的新舊解析方式的結果、速度與記憶體用量
+
+用法: python benchmarks/bench_txt_parser.py [--lines 200000] [--repeat 3]
+
+產生一個大型的假歌曲列表 (大部分為 "歌手 - 歌名"，混合 "12→" 編號、
+各種破折號與沒有空白的分隔符)，先確認 track_reader 的結果與原本逐一嘗試
+分隔符的迴圈相同 (不同時以非零狀態結束)，再比較每秒可解析的行數與
+讀取過程的記憶體峰值 (tracemalloc)。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import track_reader
+from melon_fixture import load_sample_songs
+
+SEPARATORS = [' - ', ' – ', ' — ', '–', '—', '-']
+
+
+def write_synthetic_file(path, lines):
+    """以 rank.txt 的歌曲產生 "歌手 - 歌名" 格式的大型文件"""
+    songs = load_sample_songs()
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            name, artists = songs[i % len(songs)]
+            artist = artists[0]
+            variant = i % 20
+            if variant < 2:
+                f.write(f"{i + 1}→{artist} - {name} {i}\n")
+            elif variant == 2:
+                f.write(f"{artist} – {name} {i}\n")
+            elif variant == 3:
+                f.write(f"{artist}—{name} {i}\n")
+            else:
+                f.write(f"{artist} - {name} {i}\n")
+
+
+def legacy_parse(file_path):
+    """原本 read_txt_file 的解析迴圈 (readlines + 逐一嘗試分隔符 + 每行檢查檔名)"""
+    tracks = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if '→' in line:
+            line = line.split('→', 1)[1]
+        sep_found = None
+        for sep in SEPARATORS:
+            if sep in line:
+                sep_found = sep
+                break
+        if sep_found:
+            left, right = line.split(sep_found, 1)
+            if file_path.lower().endswith('rank.txt'):
+                tracks.append({'name': right.strip(), 'artist': left.strip(), 'line_num': line_num})
+            else:
+                tracks.append({'name': left.strip(), 'artist': right.strip(), 'line_num': line_num})
+    return tracks
+
+
+def read_parse(file_path):
+    return list(track_reader.iter_txt_tracks(file_path))
+
+
+def stream_count(file_path):
+    """逐首處理而不保留結果 (--stream 的情況)"""
+    count = 0
+    for _ in track_reader.iter_txt_tracks(file_path):
+        count += 1
+    return count
+
+
+def _peak_memory(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='txt 歌曲列表解析基準測試')
+    parser.add_argument('--lines', '-n', type=int, default=200000, help='假文件行數 (預設: 200000)')
+    parser.add_argument('--repeat', '-r', type=int, default=3, help='重複次數，取最快的一次 (預設: 3)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'rank.txt')
+        write_synthetic_file(path, args.lines)
+
+        legacy_time, legacy = _best_time(lambda: legacy_parse(path), args.repeat)
+        read_time, streamed = _best_time(lambda: read_parse(path), args.repeat)
+        stream_time, _ = _best_time(lambda: stream_count(path), args.repeat)
+        peaks = [_peak_memory(lambda: legacy_parse(path)),
+                 _peak_memory(lambda: read_parse(path)),
+                 _peak_memory(lambda: stream_count(path))]
+
+    mismatches = sum(1 for old, new in zip(legacy, streamed)
+                     if (old['name'], old['artist'], old['line_num'])
+                     != (new.name, new.artist, new.line_num))
+    mismatches += abs(len(legacy) - len(streamed))
+    if mismatches:
+        print(f"✗ 結果不同: {mismatches} 首")
+    else:
+        print(f"✓ 結果相同 ({len(streamed)} 首，自動判斷為歌手在前)")
+
+    print(f"{'解析方式':<24}{'秒數':>8}{'行/秒':>12}{'記憶體峰值':>12}")
+    rows = [('原本的迴圈 (readlines)', legacy_time), ('track_reader (列表)', read_time),
+            ('track_reader (--stream)', stream_time)]
+    for (label, elapsed), peak in zip(rows, peaks):
+        print(f"{label:<24}{elapsed:>8.3f}{args.lines / elapsed:>12,.0f}{peak / 1024 / 1024:>10.1f} MB")
+    print(f"速度: 列表 {legacy_time / read_time:.2f}x，--stream {legacy_time / stream_time:.2f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
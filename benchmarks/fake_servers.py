@@ -0,0 +1,416 @@
+"""本機替身伺服器，讓爬蟲與播放清單流程可以離線測試
+
+用法: python benchmarks/fake_servers.py melon [--port 8000] [--latency 0.05]
+      python benchmarks/fake_servers.py youtube [--port 8001] [--error-rate 0.01] [--quota 10000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import googleapiclient.discovery_cache
+
+from melon_fixture import SYNTHETIC_FIXTURE, build_chart_html
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quota import QUOTA_COSTS
+
+DISCOVERY_PATH = '/discovery/v1/apis/youtube/v3/rest'
+# API 方法對應的配額種類 (與 quota.QUOTA_COSTS 相同)
+METHOD_COSTS = {
+    'search.list': 'search',
+    'videos.list': 'videos',
+    'playlists.insert': 'playlist',
+    'playlistItems.insert': 'insert',
+    'playlistItems.update': 'update',
+    'playlistItems.delete': 'delete',
+    'playlistItems.list': 'list',
+}
+
+
+class FakeMelonServer:
+    """提供靜態 Melon 排行榜頁面的本機 HTTP 伺服器
+
+    任何路徑都回傳同一份排行榜頁面 (路徑含 404 時回傳 404)，
+    並記錄請求數與實際建立的連線數，用來確認 keep-alive 連線池是否生效。
+    etag=True 時回傳 ETag，並對相符的 If-None-Match 回傳 304。
+    """
+
+    def __init__(self, html=None, latency=0.0, host='127.0.0.1', port=0, etag=False):
+        if html is None:
+            if os.path.exists(SYNTHETIC_FIXTURE):
+                with open(SYNTHETIC_FIXTURE, 'rb') as f:
+                    html = f.read()
+            else:
+                html = build_chart_html()
+        self.html = html.encode('utf-8') if isinstance(html, str) else html
+        self.latency = latency
+        self.etag = etag
+        self.requests = 0
+        self.not_modified = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path='/chart/index.htm'):
+        return self.base_url + path
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    server.connections.add(self.client_address)
+                if server.latency:
+                    time.sleep(server.latency)
+                if '404' in self.path:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                etag = '"%s"' % hashlib.md5(server.html).hexdigest() if server.etag else None
+                if etag and self.headers.get('If-None-Match') == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                if etag:
+                    self.send_header('ETag', etag)
+                self.send_header('Content-Type', 'text/html; charset=UTF-8')
+                self.send_header('Content-Length', str(len(server.html)))
+                self.end_headers()
+                self.wfile.write(server.html)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeYouTubeServer:
+    """模擬 YouTube Data API v3 的本機 HTTP 伺服器
+
+    提供 discovery 文件 (DISCOVERY_PATH，rootUrl 指向本伺服器)，
+    因此 googleapiclient 可以直接以 discoveryServiceUrl 建立客戶端。
+    支援 search.list、videos.list、playlists.insert、playlistItems 的
+    insert/list/update/delete 與批次請求 (/batch)。
+
+    - latency: 每個 HTTP 請求的延遲秒數 (批次請求只延遲一次)
+    - error_rate: 每個 API 呼叫回傳 503 backendError 的機率 (不消耗配額)
+    - quota: 每日配額 (依 quota.QUOTA_COSTS 計算)，用完後回傳 403 quotaExceeded；None 為不限
+
+    GET /_stats 回傳各 API 方法的呼叫次數、HTTP 請求數與已使用的配額 (JSON)。
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, quota=None, host='127.0.0.1', port=0,
+                 seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.quota = quota
+        self.quota_used = 0
+        self.calls = {}
+        self.errors = {}
+        self.http_requests = 0
+        self.playlists = {}
+        self._random = random.Random(seed)
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+        self._discovery = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def discovery_url(self):
+        return self.base_url + DISCOVERY_PATH
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': dict(self.calls),
+                'errors': dict(self.errors),
+                'http_requests': self.http_requests,
+                'quota_used': self.quota_used,
+                'playlists': len(self.playlists),
+                'playlist_items': sum(len(items) for items in self.playlists.values()),
+            }
+
+    def discovery_document(self):
+        """googleapiclient 內建的 YouTube discovery 文件，網址改為本伺服器"""
+        if self._discovery is None:
+            path = os.path.join(os.path.dirname(googleapiclient.discovery_cache.__file__),
+                                'documents', 'youtube.v3.json')
+            with open(path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            root = self.base_url + '/'
+            document['rootUrl'] = root
+            document['mtlsRootUrl'] = root
+            document['baseUrl'] = root + document.get('servicePath', '')
+            self._discovery = json.dumps(document).encode('utf-8')
+        return self._discovery
+
+    def call(self, method, path, query, body):
+        """執行一個 API 呼叫，回傳 (狀態碼, 回應 dict)"""
+        name = self._method_name(method, path)
+        if name is None:
+            return 404, _api_error(404, 'notFound', f"{method} {path}")
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return 503, _api_error(503, 'backendError', 'Backend Error')
+            cost = QUOTA_COSTS[METHOD_COSTS[name]]
+            if self.quota is not None and self.quota_used + cost > self.quota:
+                self.errors[name] = self.errors.get(name, 0) + 1
+                return 403, _api_error(403, 'quotaExceeded', 'The request cannot be completed '
+                                       'because you have exceeded your quota.')
+            self.quota_used += cost
+            return getattr(self, '_' + name.replace('.', '_'))(query, body)
+
+    def _method_name(self, method, path):
+        resource = path.rsplit('/', 1)[-1]
+        verbs = {'GET': 'list', 'POST': 'insert', 'PUT': 'update', 'DELETE': 'delete'}
+        name = f"{resource}.{verbs.get(method, '')}"
+        return name if name in METHOD_COSTS else None
+
+    def _new_id(self, prefix):
+        self._next_id += 1
+        return f"{prefix}{self._next_id}"
+
+    def _search_list(self, query, body):
+        q = query.get('q', [''])[0]
+        count = max(1, min(int(query.get('maxResults', ['5'])[0]), 50))
+        digest = hashlib.md5(q.encode('utf-8')).hexdigest()[:9]
+        titles = [f"{q} (Official MV)", f"{q} (Cover)", f"{q} (Live)", f"{q} (Lyrics)"]
+        items = []
+        for i in range(count):
+            title = titles[i] if i < len(titles) else f"{q} #{i}"
+            items.append({
+                'kind': 'youtube#searchResult',
+                'id': {'kind': 'youtube#video', 'videoId': f"v{digest}{i:02d}"},
+                'snippet': {'title': title, 'channelTitle': 'Fake Channel'},
+            })
+        return 200, {'kind': 'youtube#searchListResponse', 'items': items}
+
+    def _videos_list(self, query, body):
+        ids = query.get('id', [''])[0].split(',')
+        items = [{'id': video_id, 'contentDetails': {'duration': 'PT3M30S'}}
+                 for video_id in ids if video_id]
+        return 200, {'kind': 'youtube#videoListResponse', 'items': items}
+
+    def _playlists_insert(self, query, body):
+        playlist_id = self._new_id('PLfake')
+        self.playlists[playlist_id] = []
+        return 200, {'kind': 'youtube#playlist', 'id': playlist_id,
+                     'snippet': body.get('snippet', {})}
+
+    def _playlistItems_insert(self, query, body):
+        snippet = body.get('snippet', {})
+        items = self.playlists.get(snippet.get('playlistId'))
+        if items is None:
+            return 404, _api_error(404, 'playlistNotFound', 'Playlist not found')
+        video_id = snippet.get('resourceId', {}).get('videoId')
+        item = {'id': self._new_id('PLI'), 'videoId': video_id}
+        position = snippet.get('position')
+        if position is None or position >= len(items):
+            items.append(item)
+        else:
+            items.insert(position, item)
+        return 200, {'kind': 'youtube#playlistItem', 'id': item['id'], 'snippet': snippet}
+
+    def _playlistItems_list(self, query, body):
+        items = self.playlists.get(query.get('playlistId', [''])[0])
+        if items is None:
+            return 404, _api_error(404, 'playlistNotFound', 'Playlist not found')
+        size = min(int(query.get('maxResults', ['5'])[0]), 50)
+        start = int(query.get('pageToken', ['0'])[0] or 0)
+        page = [{'id': item['id'], 'snippet': {'position': start + i, 'resourceId': {
+                    'kind': 'youtube#video', 'videoId': item['videoId']}}}
+                for i, item in enumerate(items[start:start + size])]
+        response = {'kind': 'youtube#playlistItemListResponse', 'items': page,
+                    'pageInfo': {'totalResults': len(items)}}
+        if start + size < len(items):
+            response['nextPageToken'] = str(start + size)
+        return 200, response
+
+    def _find_item(self, item_id):
+        for items in self.playlists.values():
+            for index, item in enumerate(items):
+                if item['id'] == item_id:
+                    return items, index
+        return None, None
+
+    def _playlistItems_update(self, query, body):
+        items, index = self._find_item(body.get('id'))
+        if items is None:
+            return 404, _api_error(404, 'playlistItemNotFound', 'Playlist item not found')
+        item = items.pop(index)
+        items.insert(body.get('snippet', {}).get('position', len(items)), item)
+        return 200, {'kind': 'youtube#playlistItem', 'id': item['id'],
+                     'snippet': body.get('snippet', {})}
+
+    def _playlistItems_delete(self, query, body):
+        items, index = self._find_item(query.get('id', [''])[0])
+        if items is None:
+            return 404, _api_error(404, 'playlistItemNotFound', 'Playlist item not found')
+        del items[index]
+        return 204, None
+
+    def batch(self, content_type, body):
+        """執行 multipart/mixed 批次請求，依原順序執行每個子請求"""
+        message = BytesParser().parsebytes(
+            b'Content-Type: ' + content_type.encode('ascii') + b'\r\n\r\n' + body)
+        boundary = 'batch_' + hashlib.md5(body).hexdigest()
+        parts = []
+        for part in message.get_payload():
+            payload = part.get_payload(decode=True)
+            head, _, sub_body = payload.replace(b'\r\n', b'\n').partition(b'\n\n')
+            method, target = head.split(b'\n', 1)[0].decode('utf-8').split(' ')[:2]
+            url = urlsplit(target)
+            status, response = self.call(method, url.path, parse_qs(url.query),
+                                         json.loads(sub_body) if sub_body.strip() else {})
+            content = json.dumps(response).encode('utf-8') if response is not None else b''
+            content_id = part['Content-ID'] or ''
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id[1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {_reason(status)}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\n\r\n".encode('utf-8') + content + b'\r\n')
+        return f'multipart/mixed; boundary={boundary}', b''.join(parts) + f"--{boundary}--\r\n".encode()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # 標頭與內容分兩次送出，不關閉 Nagle 時每個請求會多等 40 ms 的延遲 ACK
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                with server._lock:
+                    server.http_requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                url = urlsplit(self.path)
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b''
+
+                if url.path == DISCOVERY_PATH:
+                    return self._send(200, server.discovery_document())
+                if url.path == '/_stats':
+                    return self._send(200, json.dumps(server.stats()).encode('utf-8'))
+                if url.path.startswith('/batch'):
+                    content_type, content = server.batch(self.headers.get('Content-Type'), body)
+                    return self._send(200, content, content_type)
+                status, response = server.call(self.command, url.path, parse_qs(url.query),
+                                               json.loads(body) if body.strip() else {})
+                content = json.dumps(response).encode('utf-8') if response is not None else b''
+                self._send(status, content)
+
+            def _send(self, status, content, content_type='application/json; charset=UTF-8'):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _api_error(code, reason, message):
+    return {'error': {'code': code, 'message': message,
+                      'errors': [{'reason': reason, 'message': message, 'domain': 'youtube'}]}}
+
+
+def _reason(status):
+    return BaseHTTPRequestHandler.responses.get(status, ('',))[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='啟動本機替身伺服器')
+    parser.add_argument('server', choices=['melon', 'youtube'], help='伺服器種類')
+    parser.add_argument('--port', type=int, default=8000, help='監聽埠號 (預設: 8000)')
+    parser.add_argument('--latency', type=float, default=0.0, help='每個請求的延遲秒數')
+    parser.add_argument('--etag', action='store_true', help='(melon) 回傳 ETag 並支援 304 Not Modified')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='(youtube) API 呼叫回傳 503 的機率')
+    parser.add_argument('--quota', type=int, help='(youtube) 每日配額，用完後回傳 403 quotaExceeded')
+    args = parser.parse_args()
+
+    if args.server == 'youtube':
+        server = FakeYouTubeServer(latency=args.latency, error_rate=args.error_rate,
+                                   quota=args.quota, port=args.port)
+        print(f"假 YouTube API 伺服器已啟動，discovery 文件: {server.discovery_url}")
+    else:
+        server = FakeMelonServer(latency=args.latency, port=args.port, etag=args.etag)
+        print(f"假 Melon 伺服器已啟動: {server.url()}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
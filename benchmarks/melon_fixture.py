@@ -0,0 +1,138 @@
+"""Melon 排行榜頁面的測試資料
+
+python benchmarks/melon_fixture.py                 產生合成頁面 fixtures/synthetic_chart.html
+python benchmarks/melon_fixture.py --save daily    下載實際的排行榜頁面 (名稱或網址) 保存到 fixtures/
+
+合成頁面只模仿實際頁面的結構，解析器的速度比較應以保存的實際頁面為準。
+"""
+import argparse
+import html
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+RANK_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rank.txt')
+# 合成頁面的檔名前綴，其他 .html 都視為保存的實際頁面
+SYNTHETIC_PREFIX = 'synthetic_'
+SYNTHETIC_FIXTURE = os.path.join(FIXTURE_DIR, SYNTHETIC_PREFIX + 'chart.html')
+
+
+def load_sample_songs():
+    """讀取 rank.txt 作為假排行榜的歌曲來源，回傳 [(歌名, [歌手...]), ...]"""
+    songs = []
+    with open(RANK_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if ' - ' in line:
+                artist, name = line.strip().split(' - ', 1)
+                songs.append((name, [artist]))
+    return songs
+
+
+def build_chart_html(size=100, filler=200, seed_songs=None):
+    """產生與 Melon 排行榜頁面結構相同的 HTML
+
+    - 每一列都包含隱藏的 checkEllipsis 重複歌手連結 (與實際頁面相同)
+    - 每 7 首為多位歌手，每 13 首的歌手欄位只有 span 沒有連結
+    - filler 為頁面上與排行榜無關的導覽列/腳本區塊數量
+    """
+    seed_songs = seed_songs or load_sample_songs()
+    parts = ['<!DOCTYPE html><html lang="ko"><head><meta charset="UTF-8"><title>멜론차트</title>']
+    for i in range(filler):
+        parts.append(f'<script type="text/javascript">var melonConfig{i} = {{"menuId": {i}}};</script>')
+    parts.append('</head><body><div id="wrap"><div id="gnb"><ul>')
+    for i in range(filler):
+        parts.append(f'<li class="gnb_menu{i % 5}"><a href="/menu/{i}.htm"><span>메뉴 {i}</span></a></li>')
+    parts.append('</ul></div><div id="cont_wrap"><form id="frm"><table><thead><tr>'
+                 '<th scope="col">순위</th><th scope="col">곡정보</th></tr></thead><tbody>')
+
+    for rank in range(1, size + 1):
+        name, artists = seed_songs[(rank - 1) % len(seed_songs)]
+        if rank > len(seed_songs):
+            name = f"{name} {rank}"
+        if rank % 7 == 0:
+            artists = artists + [f"Featuring {rank}"]
+        name = html.escape(name)
+        if rank % 13 == 0:
+            artist_html = ''.join(f'<span>{html.escape(a)}</span><span>,</span>' for a in artists)
+        else:
+            links = ''.join(
+                f'<a href="javascript:melon.link.goArtistDetail(\'{rank}{i}\');" '
+                f'title="{html.escape(a)} - 페이지 이동">{html.escape(a)}</a>'
+                for i, a in enumerate(artists))
+            artist_html = f'{links}<span class="checkEllipsis" style="display:none">{links}</span>'
+        parts.append(
+            f'<tr class="lst{50 if rank <= 50 else 100}" data-song-no="{1000000 + rank}">'
+            f'<td><div class="wrap t_center"><span class="rank ">{rank}</span></div></td>'
+            f'<td><div class="wrap"><a href="javascript:;" class="image_typeAll">'
+            f'<img src="https://cdnimg.melon.co.kr/{rank}.jpg" alt="{name}"></a></div></td>'
+            f'<td><div class="wrap"><div class="wrap_song_info">'
+            f'<div class="ellipsis rank01"><span><a href="javascript:melon.play.playSong(\'1\',{rank});" '
+            f'title="{name} 재생">{name}</a></span></div><br>'
+            f'<div class="ellipsis rank02">{artist_html}</div>'
+            f'</div></div></td></tr>'
+        )
+
+    parts.append('</tbody></table></form></div><div id="footer">')
+    for i in range(filler):
+        parts.append(f'<p class="footer_info{i % 3}">Copyright Kakao Entertainment {i}</p>')
+    parts.append('</div></div></body></html>')
+    return ''.join(parts)
+
+
+def is_synthetic(path):
+    return os.path.basename(path).startswith(SYNTHETIC_PREFIX)
+
+
+def write_fixture(path=None, size=100):
+    path = path or SYNTHETIC_FIXTURE
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(build_chart_html(size))
+    return path
+
+
+def save_page(chart, path=None):
+    """下載實際的排行榜頁面並原樣保存 (不改變編碼)，回傳 (路徑, 解析出的歌曲數)
+
+    使用與爬蟲相同的 Session 與標頭；解析不出任何歌曲時不保存 (可能是錯誤頁面或登入頁面)。
+    """
+    import melon_scraper
+
+    url = melon_scraper.resolve_chart_url(chart)
+    response = melon_scraper.create_session().get(url, timeout=melon_scraper.DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    songs = melon_scraper.parse_melon_chart(response.content, 'html.parser')
+    if not songs:
+        raise ValueError(f"{url} 解析不出任何歌曲，沒有保存")
+
+    if path is None:
+        label = chart if chart in melon_scraper.MELON_CHARTS else 'page'
+        path = os.path.join(FIXTURE_DIR, f"melon_{label}_{datetime.now().strftime('%Y%m%d')}.html")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(response.content)
+    return path, len(songs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='產生或保存 Melon 排行榜測試頁面')
+    parser.add_argument('--save', metavar='CHART', help='下載並保存實際頁面 (排行榜名稱如 daily，或網址)')
+    parser.add_argument('--output', '-o', help='保存路徑 (預設: fixtures/ 中依名稱與日期命名)')
+    args = parser.parse_args()
+
+    if not args.save:
+        print(f"已產生: {write_fixture(args.output)}")
+        return
+    try:
+        path, count = save_page(args.save, args.output)
+    except Exception as e:
+        print(f"保存失敗: {e}")
+        sys.exit(1)
+    print(f"已保存: {path} ({count} 首)")
+
+
+if __name__ == '__main__':
+    main()
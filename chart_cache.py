@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from metrics import metrics
+
+
+class ChartCache:
+    """排行榜頁面的 HTTP 快取
+
+    每個網址保存回應內容、ETag/Last-Modified、內容雜湊與解析後的歌曲列表，
+    下次請求時送出 If-None-Match/If-Modified-Since。伺服器回傳 304 或內容
+    雜湊沒有改變時，直接使用之前解析好的歌曲列表。
+    """
+
+    def __init__(self, cache_dir=".chart_cache"):
+        self.cache_dir = cache_dir
+        self.not_modified = 0
+        self.unchanged = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def get(self, url):
+        """讀取網址的快取資料，沒有時回傳 None"""
+        try:
+            with open(self._path(url, '.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, entry):
+        """依快取資料產生條件式請求標頭"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def put(self, url, response, songs, parser):
+        """保存回應內容與解析結果"""
+        entry = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': content_hash(response.content),
+            'parser': parser,
+            'fetched_at': time.time(),
+            'songs': songs,
+        }
+        self._write(self._path(url, '.html'), response.content)
+        self._write(self._path(url, '.json'), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+        return entry
+
+    def refresh(self, url, entry, response):
+        """內容沒有改變時只更新驗證標頭與時間"""
+        entry['etag'] = response.headers.get('ETag') or entry.get('etag')
+        entry['last_modified'] = response.headers.get('Last-Modified') or entry.get('last_modified')
+        entry['fetched_at'] = time.time()
+        self._write(self._path(url, '.json'), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+    def record(self, kind):
+        with self._lock:
+            setattr(self, kind, getattr(self, kind) + 1)
+        metrics.cache_result('chart', kind != 'misses')
+
+    def _write(self, path, data):
+        # 先寫入暫存檔再取代，避免中斷時留下不完整的快取
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def print_stats(self):
+        print(f"排行榜快取: 304 未修改 {self.not_modified} / 內容未變 {self.unchanged}"
+              f" / 重新解析 {self.misses}")
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
@@ -0,0 +1,255 @@
+import argparse
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+
+def _pack(ids):
+    ranking = array('I', ids)
+    if sys.byteorder == 'big':
+        ranking.byteswap()
+    return ranking.tobytes()
+
+
+def _unpack(blob):
+    ranking = array('I')
+    ranking.frombytes(blob)
+    if sys.byteorder == 'big':
+        ranking.byteswap()
+    return ranking
+
+
+def parse_date(text):
+    """'YYYY-MM-DD' 或 'YYYY-MM-DD HH:MM' (本地時間) 轉為時間戳"""
+    for fmt in ('%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"無法解析日期: {text}")
+
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+class ChartHistory:
+    """排行榜快照的時間序列 (SQLite)
+
+    每首歌 ("歌名 - 歌手") 只保存一次並對應到整數 ID，每個排名以 ID 陣列
+    (依名次排序) 保存，並以內容雜湊去除重複：與上一次相同的快照只更新
+    last_seen，不新增資料。查詢時每個不同的排名只解碼一次。
+    """
+
+    def __init__(self, db_path="chart_history.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._song_ids = {}
+        self._song_names = {}
+        self._rankings = {}
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS songs ("
+            " id INTEGER PRIMARY KEY,"
+            " song TEXT NOT NULL UNIQUE);"
+            "CREATE TABLE IF NOT EXISTS rankings ("
+            " hash TEXT PRIMARY KEY,"
+            " ids BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            " id INTEGER PRIMARY KEY,"
+            " chart TEXT NOT NULL,"
+            " taken_at REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " hash TEXT NOT NULL REFERENCES rankings (hash));"
+            "CREATE INDEX IF NOT EXISTS snapshots_chart ON snapshots (chart, taken_at);"
+        )
+        self._conn.commit()
+        for song_id, song in self._conn.execute("SELECT id, song FROM songs"):
+            self._song_ids[song] = song_id
+            self._song_names[song_id] = song
+
+    def _intern(self, songs):
+        new = [song for song in dict.fromkeys(songs) if song not in self._song_ids]
+        if new:
+            self._conn.executemany("INSERT OR IGNORE INTO songs (song) VALUES (?)",
+                                   [(song,) for song in new])
+            for song in new:
+                song_id = self._conn.execute("SELECT id FROM songs WHERE song = ?",
+                                             (song,)).fetchone()[0]
+                self._song_ids[song] = song_id
+                self._song_names[song_id] = song
+        return [self._song_ids[song] for song in songs]
+
+    def record(self, chart, songs, taken_at=None):
+        """保存排行榜快照，回傳 True 表示排名有變動 (新增了快照)"""
+        if not songs:
+            return False
+        taken_at = time.time() if taken_at is None else taken_at
+        with self._lock:
+            blob = _pack(self._intern(songs))
+            digest = hashlib.sha1(blob).hexdigest()
+            latest = self._conn.execute(
+                "SELECT id, hash FROM snapshots WHERE chart = ? ORDER BY taken_at DESC LIMIT 1",
+                (chart,)
+            ).fetchone()
+            if latest and latest[1] == digest:
+                self._conn.execute("UPDATE snapshots SET last_seen = ? WHERE id = ?",
+                                   (taken_at, latest[0]))
+                self._conn.commit()
+                return False
+            self._conn.execute("INSERT OR IGNORE INTO rankings (hash, ids) VALUES (?, ?)",
+                               (digest, blob))
+            self._conn.execute(
+                "INSERT INTO snapshots (chart, taken_at, last_seen, hash) VALUES (?, ?, ?, ?)",
+                (chart, taken_at, taken_at, digest)
+            )
+            self._conn.commit()
+            return True
+
+    def _ranking(self, digest):
+        ranking = self._rankings.get(digest)
+        if ranking is None:
+            blob = self._conn.execute("SELECT ids FROM rankings WHERE hash = ?",
+                                      (digest,)).fetchone()[0]
+            ranking = self._rankings[digest] = _unpack(blob)
+        return ranking
+
+    def _snapshots(self, chart, since=None, until=None):
+        query = "SELECT taken_at, last_seen, hash FROM snapshots WHERE chart = ?"
+        params = [chart]
+        if since is not None:
+            query += " AND last_seen >= ?"
+            params.append(since)
+        if until is not None:
+            query += " AND taken_at < ?"
+            params.append(until)
+        return self._conn.execute(query + " ORDER BY taken_at", params).fetchall()
+
+    def charts(self):
+        """回傳 [(排行榜, 快照數, 第一次, 最後一次)]"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT chart, COUNT(*), MIN(taken_at), MAX(last_seen) FROM snapshots"
+                " GROUP BY chart ORDER BY chart"
+            ).fetchall()
+
+    def find_songs(self, text):
+        """回傳包含 text 的歌曲 (不分大小寫)"""
+        text = text.lower()
+        with self._lock:
+            return [song for song in self._song_ids if text in song.lower()]
+
+    def rank_history(self, song, chart='realtime'):
+        """回傳歌曲的名次變化 [(taken_at, last_seen, 名次或 None)]"""
+        with self._lock:
+            song_id = self._song_ids.get(song)
+            history = []
+            for taken_at, last_seen, digest in self._snapshots(chart):
+                ranking = self._ranking(digest)
+                rank = ranking.index(song_id) + 1 if song_id in ranking else None
+                history.append((taken_at, last_seen, rank))
+            return history
+
+    def new_entries(self, since, chart='realtime'):
+        """回傳 since 之後第一次進榜的歌曲 [(歌曲, 第一次進榜時間, 最高名次)]，依最高名次排序"""
+        with self._lock:
+            before = set()
+            for _, _, digest in self._snapshots(chart, until=since):
+                before.update(self._ranking(digest))
+            entries = {}
+            for taken_at, _, digest in self._snapshots(chart, since=since):
+                for position, song_id in enumerate(self._ranking(digest), 1):
+                    if song_id in before:
+                        continue
+                    entry = entries.get(song_id)
+                    if entry is None:
+                        entries[song_id] = [max(taken_at, since), position]
+                    elif position < entry[1]:
+                        entry[1] = position
+            return sorted(((self._song_names[song_id], first_seen, best)
+                           for song_id, (first_seen, best) in entries.items()),
+                          key=lambda entry: entry[2])
+
+    def top_movers(self, chart='realtime', since=None, limit=10):
+        """比較最新快照與 since 當時 (預設為上一個快照) 的名次
+
+        回傳 [(歌曲, 原名次, 新名次, 上升名次)]，依變動幅度排序 (新進榜的歌曲不計)。
+        """
+        with self._lock:
+            snapshots = self._snapshots(chart)
+            if len(snapshots) < 2:
+                return []
+            latest = snapshots[-1]
+            if since is None:
+                previous = snapshots[-2]
+            else:
+                candidates = [s for s in snapshots[:-1] if s[0] <= since]
+                previous = candidates[-1] if candidates else snapshots[0]
+            old_ranks = {song_id: rank for rank, song_id in
+                         enumerate(self._ranking(previous[2]), 1)}
+            movers = []
+            for rank, song_id in enumerate(self._ranking(latest[2]), 1):
+                old_rank = old_ranks.get(song_id)
+                if old_rank is not None and old_rank != rank:
+                    movers.append((self._song_names[song_id], old_rank, rank, old_rank - rank))
+            movers.sort(key=lambda mover: -abs(mover[3]))
+            return movers[:limit]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查詢保存的 Melon 排行榜歷史')
+    parser.add_argument('--db', type=str, default='chart_history.db',
+                        help='排行榜歷史資料庫 (預設: chart_history.db)')
+    parser.add_argument('--chart', '-c', type=str, default='realtime',
+                        help='排行榜名稱或網址 (預設: realtime)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('charts', help='列出已保存的排行榜與快照數量')
+    history_parser = commands.add_parser('history', help='歌曲的名次變化')
+    history_parser.add_argument('song', help='歌名或歌手 (部分文字即可)')
+    new_parser = commands.add_parser('new', help='某個日期之後新進榜的歌曲')
+    new_parser.add_argument('--since', required=True, help='日期 (YYYY-MM-DD 或 "YYYY-MM-DD HH:MM")')
+    movers_parser = commands.add_parser('movers', help='名次變動最大的歌曲')
+    movers_parser.add_argument('--since', help='與此時間的排名比較 (預設: 上一個快照)')
+    movers_parser.add_argument('--limit', '-l', type=int, default=10, help='列出數量 (預設: 10)')
+    args = parser.parse_args()
+
+    history = ChartHistory(args.db)
+    try:
+        if args.command == 'charts':
+            for chart, count, first, last in history.charts():
+                print(f"{chart}: {count} 個快照 ({format_time(first)} ~ {format_time(last)})")
+        elif args.command == 'history':
+            songs = history.find_songs(args.song)
+            if not songs:
+                print(f"找不到歌曲: {args.song}")
+            for song in songs:
+                print(song)
+                for taken_at, last_seen, rank in history.rank_history(song, args.chart):
+                    print(f"  {format_time(taken_at)} ~ {format_time(last_seen)}: "
+                          f"{rank if rank else '未進榜'}")
+        elif args.command == 'new':
+            entries = history.new_entries(parse_date(args.since), args.chart)
+            for song, first_seen, best in entries:
+                print(f"{best:>3}. {song} (第一次進榜: {format_time(first_seen)})")
+            print(f"共 {len(entries)} 首新進榜歌曲")
+        elif args.command == 'movers':
+            since = parse_date(args.since) if args.since else None
+            for song, old_rank, rank, change in history.top_movers(args.chart, since, args.limit):
+                arrow = '↑' if change > 0 else '↓'
+                print(f"{arrow}{abs(change):>3}  {old_rank:>3} → {rank:<3} {song}")
+    except ValueError as e:
+        print(e)
+    finally:
+        history.close()
+
+
+if __name__ == '__main__':
+    main()
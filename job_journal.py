@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+
+
+class JobJournal:
+    """以 JSON lines 記錄播放清單建立進度，中斷後可用 --resume 繼續
+
+    記錄種類:
+    - {"type": "job", "playlist_id": ..., "source": ..., "playlist_name": ...}
+    - {"type": "track", "num": ..., "name": ..., "artist": ..., "video_id": ..., "status": ...}
+      status 為 resolved (已找到影片) 或 inserted (已加入播放清單)
+
+    每筆記錄以單次 write 附加到檔案並 fsync，中斷時最多只會留下最後一行
+    不完整的記錄，讀取時會自動截掉。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.job = None
+        self.tracks = {}
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """讀取既有的記錄檔，回傳是否有可繼續的工作"""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            data = f.read()
+
+        # 截掉最後一行不完整的記錄 (寫入途中中斷)
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            print(f"記錄檔最後一行不完整，已忽略: {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+
+        for line in data[:end].splitlines():
+            try:
+                self._apply(json.loads(line))
+            except ValueError:
+                continue
+        return self.job is not None and bool(self.job.get('playlist_id'))
+
+    def _apply(self, record):
+        if record.get('type') == 'job':
+            self.job = record
+            self.tracks = {}
+        elif record.get('type') == 'track':
+            self.tracks[record['num']] = record
+
+    def start(self, playlist_id, source, playlist_name):
+        """開始新的工作 (清空舊記錄)"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._append({
+            'type': 'job',
+            'playlist_id': playlist_id,
+            'source': source,
+            'playlist_name': playlist_name,
+            'started_at': time.time()
+        })
+
+    def get(self, num, track):
+        """取得第 num 首的記錄，歌名或歌手不同 (來源已改變) 時回傳 None"""
+        record = self.tracks.get(num)
+        if record and record.get('name') == track['name'] and record.get('artist') == track['artist']:
+            return record
+        return None
+
+    def record_track(self, num, track, video_id, status):
+        self._append({
+            'type': 'track',
+            'num': num,
+            'name': track['name'],
+            'artist': track['artist'],
+            'video_id': video_id,
+            'status': status
+        })
+
+    def _append(self, record):
+        data = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, data)
+            os.fsync(self._fd)
+            self._apply(record)
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
@@ -0,0 +1,77 @@
+import argparse
+
+from track_sources import ManifestSource
+from job_journal import JobJournal
+from playlist_pipeline import PlaylistPipeline, add_pipeline_arguments, pipeline_options
+from metrics import metrics
+
+class ManifestToYouTubePlaylist(PlaylistPipeline):
+    """從匯出的清單檔創建YouTube播放清單 (已有影片 ID，只需要添加歌曲的配額)"""
+
+    def create_playlist_from_manifest(self, manifest_path, playlist_name=None, limit=None,
+                                      batch_size=0, dry_run=False, sync_playlist_id=None,
+                                      journal=None, resume=False, plan=False,
+                                      manifest=None, privacy='public'):
+        """從清單檔重建 (或複製到其他帳號) 播放清單，只有上次失敗的歌曲需要搜索"""
+        return self.run(ManifestSource(manifest_path, limit),
+                        playlist_name=playlist_name, batch_size=batch_size, dry_run=dry_run,
+                        sync_playlist_id=sync_playlist_id, journal=journal, resume=resume,
+                        plan=plan, manifest=manifest, privacy=privacy)
+
+def main():
+    parser = argparse.ArgumentParser(description='從清單檔 (--manifest 匯出的 .json/.csv) 創建YouTube播放清單')
+    parser.add_argument(
+        'manifest_file',
+        help='清單檔路徑'
+    )
+    parser.add_argument(
+        '--name', '-n',
+        type=str,
+        help='自訂播放清單名稱 (預設: 清單檔中的名稱加上今天的日期)'
+    )
+    parser.add_argument(
+        '--limit', '-l',
+        type=int,
+        help='限制歌曲數量 (只取前N首)'
+    )
+    add_pipeline_arguments(
+        parser,
+        token_file="token.json",
+        journal_help='工作進度記錄檔 (預設: <清單檔>.journal.jsonl)',
+        dry_run_help='只讀取清單檔並列出歌曲，不進行授權與任何 API 請求'
+    )
+
+    args = parser.parse_args()
+
+    journal_path = args.journal or args.manifest_file + ".journal.jsonl"
+    journal = JobJournal(journal_path)
+    converter = ManifestToYouTubePlaylist(**pipeline_options(args))
+
+    try:
+        converter.create_playlist_from_manifest(
+            manifest_path=args.manifest_file,
+            playlist_name=args.name,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            dry_run=args.dry_run,
+            sync_playlist_id=args.sync,
+            journal=journal,
+            resume=args.resume,
+            plan=args.plan,
+            manifest=args.manifest,
+            privacy=args.privacy
+        )
+
+    except KeyboardInterrupt:
+        print("\n程序被用戶中斷")
+    except Exception as e:
+        print(f"程序執行出錯: {e}")
+    finally:
+        if args.metrics_file:
+            metrics.print_summary()
+            metrics.export(args.metrics_file, args.metrics_format)
+        journal.close()
+        converter.close()
+
+if __name__ == '__main__':
+    main()
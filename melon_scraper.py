@@ -1,69 +1,105 @@
-import requests
-from bs4 import BeautifulSoup
 import time
 import sys
 import codecs
-import pprint
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def scrape_melon_chart():
-    url = "https://www.melon.com/chart/index.htm"
+from chart_cache import ChartCache, content_hash
+from chart_history import ChartHistory
+from metrics import metrics
+
+# requests、BeautifulSoup 與 lxml 在實際爬取/解析時才載入，
+# 只需要排行榜網址等常數的模組 (以及 --help) 不必等待這些套件載入
+
+MELON_CHART_URL = "https://www.melon.com/chart/index.htm"
+# 可用名稱指定的排行榜
+MELON_CHARTS = {
+    'realtime': MELON_CHART_URL,
+    'hot100': "https://www.melon.com/chart/hot100/index.htm",
+    'daily': "https://www.melon.com/chart/day/index.htm",
+    'weekly': "https://www.melon.com/chart/week/index.htm",
+    'monthly': "https://www.melon.com/chart/month/index.htm",
+    'genre': "https://www.melon.com/genre/song_list.htm?gnrCode=GN0100",
+}
+PARSERS = ['auto', 'lxml', 'strainer', 'html.parser']
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+# (連線逾時, 讀取逾時) 秒數
+DEFAULT_TIMEOUT = (5, 20)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(pool_size=10, retries=2):
+    """建立共用連線池的 requests.Session (keep-alive)"""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retries)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(HEADERS)
+    return session
+
+
+def get_session():
+    """取得模組共用的 Session，重複爬取時沿用已建立的連線"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def resolve_chart_url(chart):
+    """排行榜名稱 (如 daily) 轉換為網址，其他值視為網址直接使用"""
+    return MELON_CHARTS.get(chart, chart)
+
+
+def fetch_melon_chart(url, parser='auto', session=None, timeout=DEFAULT_TIMEOUT, cache=None):
+    """下載並解析排行榜頁面，出錯時直接拋出例外
+
+    有 cache (ChartCache) 時送出條件式請求，頁面未改變就直接回傳快取的解析結果。
+    """
+    session = session or get_session()
+    entry = cache.get(url) if cache is not None else None
+    headers = cache.conditional_headers(entry) if entry else None
+    
+    with metrics.timer('scrape'):
+        response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code >= 400:
+        metrics.incr('http_errors_total', phase='scrape', status=response.status_code)
+    if response.status_code == 304 and entry:
+        cache.record('not_modified')
+        return entry['songs']
+    response.raise_for_status()
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    if entry and entry.get('content_hash') == content_hash(response.content):
+        cache.record('unchanged')
+        cache.refresh(url, entry, response)
+        return entry['songs']
     
+    with metrics.timer('parse', parser=parser):
+        songs = parse_melon_chart(response.content, parser)
+    if cache is not None:
+        cache.record('misses')
+        if songs:
+            cache.put(url, response, songs, parser)
+    return songs
+
+
+def scrape_melon_chart(parser='auto', url=MELON_CHART_URL, session=None,
+                       timeout=DEFAULT_TIMEOUT, cache=None):
+    import requests
+
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        songs = []
-        
-        # Try different selectors for song titles and artists
-        chart_rows = soup.find_all('tr')
-        
-        for row in chart_rows:
-            song_elem = row.find('div', class_='ellipsis rank01')
-            artist_elem = row.find('div', class_='ellipsis rank02')
-            
-            if song_elem and artist_elem:
-                song_link = song_elem.find('a')
-                
-                if song_link:
-                    song_title = song_link.get_text().strip()
-                    
-                    # Get all artist links from the artist element
-                    artist_links = artist_elem.find_all('a')
-                    if artist_links:
-                        # Extract all artist names and remove duplicates while preserving order
-                        artists = []
-                        seen = set()
-                        for a in artist_links:
-                            artist_name = a.get_text().strip()
-                            if artist_name and artist_name not in seen:
-                                artists.append(artist_name)
-                                seen.add(artist_name)
-                        artist_str = '/'.join(artists) if len(artists) > 1 else artists[0] if artists else ""
-                    else:
-                        # Fallback to getting text from span elements
-                        artist_spans = artist_elem.find_all('span')
-                        if artist_spans:
-                            artists = []
-                            seen = set()
-                            for span in artist_spans:
-                                span_text = span.get_text().strip()
-                                if span_text and span_text not in ['|', ',', '&', ''] and span_text not in seen:
-                                    artists.append(span_text)
-                                    seen.add(span_text)
-                            artist_str = '/'.join(artists) if artists else artist_elem.get_text().strip()
-                        else:
-                            artist_str = artist_elem.get_text().strip()
-                    
-                    if song_title and artist_str:
-                        songs.append(f"{song_title} - {artist_str}")
-        
-        return songs
+        return fetch_melon_chart(url, parser, session, timeout, cache)
         
     except requests.RequestException as e:
         print(f"Error fetching data: {e}")
@@ -73,29 +109,257 @@ def scrape_melon_chart():
         return []
 
 
+def scrape_melon_charts(charts, parser='auto', max_workers=4, pool_size=None,
+                        timeout=DEFAULT_TIMEOUT, session=None, cache=None):
+    """以共用連線池並行爬取多個排行榜
+
+    charts 為排行榜名稱或網址的列表，回傳依輸入順序排列的結果：
+    {chart: {'url': ..., 'songs': [...], 'error': None 或錯誤訊息, 'elapsed': 秒數}}
+    """
+    charts = list(dict.fromkeys(charts))
+    if not charts:
+        return {}
+    if session is None:
+        session = create_session(pool_size or max_workers)
+    
+    def scrape_one(chart):
+        url = resolve_chart_url(chart)
+        start = time.perf_counter()
+        try:
+            songs = fetch_melon_chart(url, parser, session, timeout, cache)
+            error = None
+        except Exception as e:
+            songs = []
+            error = str(e)
+        return {'url': url, 'songs': songs, 'error': error,
+                'elapsed': time.perf_counter() - start}
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(charts)))) as executor:
+        results = executor.map(scrape_one, charts)
+        return dict(zip(charts, results))
+
+
+def load_lxml():
+    """載入 lxml.html，未安裝時回傳 None"""
+    try:
+        import lxml.html
+    except ImportError:
+        return None
+    return lxml.html
+
+
+def parse_melon_chart(html, parser='auto'):
+    """解析排行榜頁面，回傳 "歌名 - 歌手" 列表
+
+    parser:
+    - auto: 有安裝 lxml 時使用 lxml，否則使用 html.parser
+    - lxml: 以 lxml + XPath 直接取出排行榜欄位 (最快)
+    - strainer: BeautifulSoup 搭配 SoupStrainer，只建立 <tr> 的節點
+    - html.parser: 原本的 BeautifulSoup 完整解析
+    快速解析失敗或結果為空時會自動改用 html.parser。
+    """
+    if parser == 'auto':
+        parser = 'lxml' if load_lxml() is not None else 'html.parser'
+    
+    if parser != 'html.parser':
+        try:
+            if parser == 'lxml':
+                songs = _parse_with_lxml(html)
+            elif parser == 'strainer':
+                songs = _parse_with_strainer(html)
+            else:
+                raise ValueError(f"未知的解析器: {parser}")
+            if songs:
+                return songs
+            print(f"{parser} 解析結果為空，改用 html.parser")
+        except Exception as e:
+            print(f"{parser} 解析出錯，改用 html.parser: {e}")
+    
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    return _parse_soup_rows(soup.find_all('tr'))
+
+
+def _parse_with_strainer(html):
+    """只解析 <tr> 節點，跳過頁面其他部分"""
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(html, 'lxml' if load_lxml() is not None else 'html.parser',
+                         parse_only=SoupStrainer('tr'))
+    return _parse_soup_rows(soup.find_all('tr'))
+
+
+def _parse_soup_rows(chart_rows):
+    songs = []
+    
+    for row in chart_rows:
+        song_elem = row.find('div', class_='ellipsis rank01')
+        artist_elem = row.find('div', class_='ellipsis rank02')
+        
+        if song_elem and artist_elem:
+            song_link = song_elem.find('a')
+            
+            if song_link:
+                song_title = song_link.get_text().strip()
+                artist_str = _format_artists(
+                    [a.get_text() for a in artist_elem.find_all('a')],
+                    [span.get_text() for span in artist_elem.find_all('span')],
+                    artist_elem.get_text()
+                )
+                
+                if song_title and artist_str:
+                    songs.append(f"{song_title} - {artist_str}")
+    
+    return songs
+
+
+def _parse_with_lxml(html):
+    """以 lxml 與 XPath 直接定位排行榜欄位"""
+    lxml_html = load_lxml()
+    if lxml_html is None:
+        raise ImportError("未安裝 lxml，請先執行: pip install lxml")
+    
+    document = lxml_html.fromstring(html)
+    songs = []
+    
+    for row in document.iter('tr'):
+        song_elems = row.xpath(".//div[normalize-space(@class)='ellipsis rank01']")
+        artist_elems = row.xpath(".//div[normalize-space(@class)='ellipsis rank02']")
+        
+        if song_elems and artist_elems:
+            song_links = song_elems[0].xpath('.//a')
+            
+            if song_links:
+                artist_elem = artist_elems[0]
+                song_title = song_links[0].text_content().strip()
+                artist_str = _format_artists(
+                    [a.text_content() for a in artist_elem.xpath('.//a')],
+                    [span.text_content() for span in artist_elem.xpath('.//span')],
+                    artist_elem.text_content()
+                )
+                
+                if song_title and artist_str:
+                    songs.append(f"{song_title} - {artist_str}")
+    
+    return songs
+
+
+def _format_artists(link_texts, span_texts, full_text):
+    """由歌手欄位的連結/span 文字組合歌手名稱"""
+    if link_texts:
+        # Extract all artist names and remove duplicates while preserving order
+        artists = []
+        seen = set()
+        for text in link_texts:
+            artist_name = text.strip()
+            if artist_name and artist_name not in seen:
+                artists.append(artist_name)
+                seen.add(artist_name)
+        return '/'.join(artists) if len(artists) > 1 else artists[0] if artists else ""
+    
+    # Fallback to getting text from span elements
+    if span_texts:
+        artists = []
+        seen = set()
+        for text in span_texts:
+            span_text = text.strip()
+            if span_text and span_text not in ['|', ',', '&', ''] and span_text not in seen:
+                artists.append(span_text)
+                seen.add(span_text)
+        return '/'.join(artists) if artists else full_text.strip()
+    
+    return full_text.strip()
+
+
 def main():
-    charts = []
+    parser = argparse.ArgumentParser(description='爬取 Melon 排行榜')
+    parser.add_argument(
+        '--parser', '-p',
+        choices=PARSERS,
+        default='auto',
+        help='HTML 解析器 (預設: auto，有安裝 lxml 時使用 lxml)'
+    )
+    parser.add_argument(
+        '--chart', '-c',
+        action='append',
+        help='排行榜名稱或網址，可重複指定 (名稱: %s，預設: realtime)' % ', '.join(MELON_CHARTS)
+    )
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=4,
+        help='並行爬取的排行榜數量 (預設: 4)'
+    )
+    parser.add_argument(
+        '--pool-size',
+        type=int,
+        help='HTTP 連線池大小 (預設與 --workers 相同)'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=DEFAULT_TIMEOUT[1],
+        help='讀取逾時秒數 (預設: %s)' % DEFAULT_TIMEOUT[1]
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default='.chart_cache',
+        help='排行榜頁面快取目錄，頁面未改變時不重新下載與解析 (預設: .chart_cache)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='停用排行榜頁面快取'
+    )
+    parser.add_argument(
+        '--history-db',
+        type=str,
+        default='chart_history.db',
+        help='保存每次爬取的排名，可用 chart_history.py 查詢 (預設: chart_history.db)'
+    )
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='不保存排行榜歷史'
+    )
+    args = parser.parse_args()
     
     # Set UTF-8 encoding for output
     if sys.platform.startswith('win'):
         sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     
+    charts = args.chart or ['realtime']
+    cache = None if args.no_cache else ChartCache(args.cache_dir)
     print("正在爬取 Melon 排行榜...")
-    songs = scrape_melon_chart()
+    results = scrape_melon_charts(charts, parser=args.parser, max_workers=args.workers,
+                                  pool_size=args.pool_size,
+                                  timeout=(DEFAULT_TIMEOUT[0], args.timeout),
+                                  cache=cache)
     
-    if songs:
-        for song in songs:
-            try:
-                print(song)
-                charts.append(song)
-                
-            except UnicodeEncodeError:
-                print(song.encode('utf-8', errors='ignore').decode('utf-8'))
-            time.sleep(0.1)  # 避免過快輸出
-
-    else:
-        print("無法獲取排行榜數據")
-    # print(charts)
+    history = None if args.no_history else ChartHistory(args.history_db)
+    lines = []
+    for chart, result in results.items():
+        if len(results) > 1:
+            lines.append(f"\n=== {chart} ({result['url']}) ===")
+        songs = result['songs']
+        
+        if songs:
+            lines.extend(songs)
+            if history is not None:
+                history.record(chart, songs)
+        else:
+            lines.append(f"無法獲取排行榜數據: {result['error'] or '沒有歌曲'}")
+    
+    output = '\n'.join(lines)
+    try:
+        print(output)
+    except UnicodeEncodeError:
+        print(output.encode('utf-8', errors='ignore').decode('utf-8'))
+    
+    if cache is not None:
+        cache.print_stats()
+    if history is not None:
+        history.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
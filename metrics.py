@@ -0,0 +1,213 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 延遲直方圖的上界 (秒)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = 'music_rank_'
+METRICS_FORMATS = ['jsonl', 'prometheus']
+
+
+class Histogram:
+    """固定區間的直方圖 (累計次數、總和與各區間計數)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """由區間計數估算分位數 (回傳所在區間的上界)"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class Metrics:
+    """執行過程的計數器與延遲直方圖 (執行緒安全)
+
+    計數器與直方圖以 (名稱, 標籤) 區分，例如
+    incr('http_errors_total', status=403)、observe('phase_seconds', 0.2, phase='search')。
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, phase, **labels):
+        """記錄區塊的執行時間到 phase_seconds{phase=...}"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start, phase=phase, **labels)
+
+    def cache_result(self, cache, hit):
+        self.incr('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+    def http_error(self, phase, err):
+        """依 HTTP 狀態碼記錄錯誤 (沒有狀態碼的連線錯誤記為 0)"""
+        self.incr('http_errors_total', phase=phase, status=_status_of(err))
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def records(self):
+        """以 dict 列表回傳所有指標 (JSON lines 的每一行)"""
+        with self._lock:
+            records = []
+            for (name, labels), value in sorted(self.counters.items(), key=_sort_key):
+                records.append({'metric': name, 'labels': dict(labels), 'type': 'counter',
+                                'value': value})
+            for (name, labels), histogram in sorted(self.histograms.items(), key=_sort_key):
+                records.append({
+                    'metric': name, 'labels': dict(labels), 'type': 'histogram',
+                    'count': histogram.count, 'sum': round(histogram.sum, 6),
+                    'buckets': dict(zip([str(b) for b in histogram.buckets] + ['+Inf'],
+                                        _cumulative(histogram.counts))),
+                    'p50': histogram.quantile(0.5), 'p95': histogram.quantile(0.95),
+                })
+            return records
+
+    def write_jsonl(self, path):
+        """將本次執行的指標附加到 JSON lines 檔案 (每個指標一行)"""
+        run = {'run_started': round(self.started_at, 3), 'run_finished': round(time.time(), 3)}
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in self.records():
+                record.update(run)
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def prometheus_text(self):
+        """以 Prometheus 文字格式回傳所有指標"""
+        lines = []
+        declared = set()
+        for record in self.records():
+            name = METRIC_PREFIX + record['metric']
+            if name not in declared:
+                lines.append(f"# TYPE {name} {record['type']}")
+                declared.add(name)
+            labels = record['labels']
+            if record['type'] == 'counter':
+                lines.append(f"{name}{_format_labels(labels)} {record['value']}")
+                continue
+            for bound, count in record['buckets'].items():
+                lines.append(f"{name}_bucket{_format_labels(labels, le=bound)} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {record['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {record['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """以 Prometheus 文字格式寫出 (可給 node_exporter 的 textfile collector 讀取)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def export(self, path, fmt=None):
+        """依格式 (預設由副檔名判斷，.prom 為 Prometheus) 寫出指標"""
+        if fmt is None:
+            fmt = 'prometheus' if path.endswith('.prom') else 'jsonl'
+        if fmt == 'prometheus':
+            self.write_prometheus(path)
+        else:
+            self.write_jsonl(path)
+        print(f"執行指標已寫入: {path}")
+
+    def print_summary(self):
+        """列出各階段的次數與延遲，以及快取命中率與錯誤數"""
+        records = self.records()
+        phases = [r for r in records if r['metric'] == 'phase_seconds']
+        if phases:
+            print("各階段耗時:")
+            for record in phases:
+                label = ', '.join(f"{k}={v}" for k, v in record['labels'].items())
+                print(f"  {label}: {record['count']} 次，共 {record['sum']:.2f} 秒"
+                      f" (p50 ≤ {record['p50']:g}s, p95 ≤ {record['p95']:g}s)")
+        caches = {}
+        for record in records:
+            if record['metric'] == 'cache_requests_total':
+                labels = record['labels']
+                caches.setdefault(labels['cache'], {})[labels['result']] = record['value']
+        for cache, results in caches.items():
+            total = sum(results.values())
+            print(f"  {cache} 快取命中率: {results.get('hit', 0) / total:.0%} ({total} 次)")
+        errors = [r for r in records if r['metric'] == 'http_errors_total']
+        if errors:
+            print("  HTTP 錯誤: " + ', '.join(
+                f"{r['labels']['phase']} {r['labels']['status']} x{r['value']}" for r in errors))
+
+
+def _status_of(err):
+    resp = getattr(err, 'resp', None)  # googleapiclient HttpError
+    if resp is not None:
+        return getattr(resp, 'status', 0)
+    response = getattr(err, 'response', None)  # requests.HTTPError
+    if response is not None:
+        return response.status_code
+    return 0
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _sort_key(item):
+    return item[0]
+
+
+def _cumulative(counts):
+    total = 0
+    result = []
+    for count in counts:
+        total += count
+        result.append(total)
+    return result
+
+
+def _format_labels(labels, **extra):
+    labels = dict(labels, **extra)
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# 整個程式共用的指標
+metrics = Metrics()
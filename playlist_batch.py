@@ -0,0 +1,178 @@
+import socket
+
+from googleapiclient.errors import HttpError
+
+from metrics import metrics
+from playlist_sync import list_playlist_items
+from retry_policy import classify_error
+
+
+def batch_insert_videos(youtube, playlist_id, video_ids, batch_size=50,
+                        limiter=None, max_rounds=3, start_position=0, retry=None,
+                        quota=None, verbose=True):
+    """以 BatchHttpRequest 批次將影片加入播放清單
+
+    每個項目都指定最終的 position 並依遞增順序加入批次，失敗的項目會在下一輪重新計算位置後
+    重試 (有 retry 時依其退避策略等待)；有 quota 時每一輪都先確認配額足夠，不夠就停止。
+    批次請求不保證依加入順序執行，全部添加後應以 repair_playlist_order 確認順序。
+    回傳與 video_ids 對應的成功與否列表；verbose 為 False 時只列出失敗的項目。
+    """
+    results = [False] * len(video_ids)
+    errors = {}
+    pending = list(range(len(video_ids)))
+
+    for round_num in range(1, max_rounds + 1):
+        if not pending:
+            break
+        # 每一輪 (包括重試) 都先確認剩餘配額足夠，不夠時停止而不送出只有部分能成功的請求
+        if quota is not None and not quota.can_afford('insert', count=len(pending)):
+            print(f"   剩餘配額不足以添加 {len(pending)} 首歌曲，停止批次添加")
+            break
+        if round_num > 1:
+            if retry is not None and not retry.backoff(round_num - 2, errors.get(pending[0])):
+                break
+            print(f"   第 {round_num} 輪重試 {len(pending)} 首失敗的歌曲...")
+
+        failed = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            if quota is not None:
+                quota.charge('insert', len(chunk))
+            chunk_failed = _execute_batch(youtube, playlist_id, video_ids, chunk,
+                                          results, errors, limiter, start_position)
+            failed.extend(chunk_failed)
+
+        pending = [i for i in sorted(failed) if _is_retryable(errors.get(i))]
+
+    for index, ok in enumerate(results):
+        if ok:
+            if verbose:
+                print(f"   ✓ 第 {index + 1} 首成功添加到播放清單")
+        else:
+            print(f"   ✗ 第 {index + 1} 首添加失敗: {errors.get(index, '剩餘配額不足，未送出')}")
+    return results
+
+
+def _execute_batch(youtube, playlist_id, video_ids, chunk, results, errors,
+                   limiter, start_position):
+    """送出一個批次請求，回傳失敗項目的索引"""
+    failed = []
+
+    def callback(request_id, response, exception):
+        index = int(request_id)
+        if exception is None:
+            results[index] = True
+        elif isinstance(exception, HttpError) and exception.resp.status == 409:
+            # 影片已存在
+            results[index] = True
+        else:
+            metrics.http_error('insert', exception)
+            errors[index] = exception
+            failed.append(index)
+
+    batch = youtube.new_batch_http_request(callback=callback)
+    # 每個項目的位置 = 索引比它小、已成功或在這個批次中的項目數 (也就是全部成功後的位置)，
+    # 依遞增順序加入，依序執行時每個項目都插在前一個項目後面
+    in_chunk = set(chunk)
+    positions = {}
+    count = 0
+    for index, ok in enumerate(results):
+        if index in in_chunk:
+            positions[index] = start_position + count
+            count += 1
+        else:
+            count += ok
+    for index in chunk:
+        request = youtube.playlistItems().insert(
+            part="snippet",
+            body={
+                'snippet': {
+                    'playlistId': playlist_id,
+                    'position': positions[index],
+                    'resourceId': {
+                        'kind': 'youtube#video',
+                        'videoId': video_ids[index]
+                    }
+                }
+            }
+        )
+        batch.add(request, request_id=str(index))
+
+    # 送出請求時 googleapiclient.http 已載入 httplib2，這裡只是取得模組
+    import httplib2
+
+    if limiter is not None:
+        limiter.acquire()
+    try:
+        with metrics.timer('insert', mode='batch'):
+            batch.execute()
+    except (HttpError, socket.timeout, ConnectionError, httplib2.HttpLib2Error) as err:
+        # 連線逾時或中斷時整個批次沒有結果，尚未完成的項目視為暫時性失敗，下一輪重試
+        metrics.http_error('insert', err)
+        print(f"   批次請求出錯: {err}")
+        for index in chunk:
+            if not results[index] and index not in failed:
+                errors[index] = err
+                failed.append(index)
+    return failed
+
+
+def repair_playlist_order(youtube, playlist_id, video_ids, start_position, retry,
+                          limiter=None, quota=None):
+    """確認 video_ids 從 start_position 開始依序排列，位置不對的項目以 playlistItems().update 移回
+
+    批次請求中的子請求可能不依加入順序執行，插入位置會因此錯開。
+    讀取播放清單每 50 首只需 1 單位配額；回傳移動的項目數。
+    """
+    if not video_ids:
+        return 0
+    current = list_playlist_items(youtube, playlist_id, retry, limiter, quota)[start_position:]
+    present = {video_id for _, video_id in current}
+    expected = [video_id for video_id in video_ids if video_id in present]
+
+    moved = 0
+    for offset, video_id in enumerate(expected):
+        if offset < len(current) and current[offset][1] == video_id:
+            continue
+        found = next((i for i in range(offset + 1, len(current)) if current[i][1] == video_id), None)
+        if found is None:
+            # 同一部影片重複出現但播放清單中只有一個
+            continue
+        if quota is not None and not quota.can_afford('update'):
+            print("   剩餘配額不足，無法修正播放清單的順序")
+            break
+        if quota is not None:
+            quota.charge('update')
+        if limiter is not None:
+            limiter.acquire()
+        item_id = current[found][0]
+        request = youtube.playlistItems().update(
+            part="snippet",
+            body={
+                'id': item_id,
+                'snippet': {
+                    'playlistId': playlist_id,
+                    'position': start_position + offset,
+                    'resourceId': {
+                        'kind': 'youtube#video',
+                        'videoId': video_id
+                    }
+                }
+            }
+        )
+        try:
+            retry.execute(request)
+        except HttpError as err:
+            print(f"   修正播放清單順序出錯: {err}")
+            break
+        current.insert(offset, current.pop(found))
+        moved += 1
+
+    if moved:
+        print(f"   批次請求未依順序執行，已移動 {moved} 首歌曲修正播放清單順序")
+    return moved
+
+
+def _is_retryable(error):
+    # 配額用完、權限不足或影片不存在時重試也不會成功
+    return classify_error(error) not in ['quota', 'fatal']
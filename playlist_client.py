@@ -0,0 +1,133 @@
+"""提交工作到 playlist_service.py 的輕量客戶端 (只使用標準函式庫，啟動很快)
+
+用法: python playlist_client.py txt rank.txt --name "我的清單" --wait
+      python playlist_client.py melon --chart daily --limit 50
+      python playlist_client.py jobs
+      python playlist_client.py status 3 --wait
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+FINISHED = ('done', 'failed', 'cancelled')
+STATUS_NAMES = {'queued': '排隊中', 'running': '執行中', 'done': '完成', 'failed': '失敗',
+                'cancelled': '已取消'}
+
+
+def request(url, data=None):
+    """送出請求並回傳 JSON；伺服器回傳錯誤時拋出 RuntimeError"""
+    body = None if data is None else json.dumps(data).encode('utf-8')
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.load(e).get('error')
+        except ValueError:
+            message = e.reason
+        raise RuntimeError(message)
+
+
+def describe(job):
+    target = os.path.basename(job['target']) if job['source'] == 'txt' else job['target']
+    line = f"#{job['id']} [{STATUS_NAMES.get(job['status'], job['status'])}] {job['source']}: {target}"
+    if job['options'].get('name'):
+        line += f" ({job['options']['name']})"
+    if job.get('playlist_id'):
+        line += f" - https://www.youtube.com/playlist?list={job['playlist_id']}"
+    if job.get('error'):
+        line += f" - {job['error']}"
+    return line
+
+
+def wait(base_url, job_id, interval=1.0):
+    """持續列出工作輸出直到工作結束，回傳最後的工作資料"""
+    offset = 0
+    while True:
+        job = request(f"{base_url}/jobs/{job_id}?offset={offset}")
+        if job['log']:
+            sys.stdout.write(job['log'])
+            sys.stdout.flush()
+        offset = job['log_offset']
+        if job['status'] in FINISHED:
+            return job
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='提交播放清單工作到 playlist_service.py')
+    parser.add_argument('--url', type=str, default=DEFAULT_URL, help='服務網址 (預設: %s)' % DEFAULT_URL)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    txt_parser = commands.add_parser('txt', help='從txt文件創建播放清單')
+    txt_parser.add_argument('path', help='txt文件路徑')
+    txt_parser.add_argument('--columns', choices=['auto', 'artist-title', 'title-artist'],
+                            help='txt 文件的欄位順序 (預設: auto)')
+    txt_parser.add_argument('--stream', action='store_true', help='邊讀取邊處理')
+    txt_parser.add_argument('--shard-size', type=int, help='分割為多個播放清單，每個最多 N 首')
+    melon_parser = commands.add_parser('melon', help='從Melon排行榜創建播放清單')
+    melon_parser.add_argument('--chart', '-c', type=str, default='realtime',
+                              help='排行榜名稱或網址 (預設: realtime)')
+    for job_parser in (txt_parser, melon_parser):
+        job_parser.add_argument('--name', '-n', type=str, help='自訂播放清單名稱')
+        job_parser.add_argument('--limit', '-l', type=int, help='限制歌曲數量')
+        job_parser.add_argument('--batch-size', type=int, help='以批次請求添加歌曲，每批數量')
+        job_parser.add_argument('--sync', type=str, metavar='PLAYLIST_ID', help='同步到現有的播放清單')
+        job_parser.add_argument('--wait', action='store_true', help='等待工作完成並列出輸出')
+
+    commands.add_parser('jobs', help='列出所有工作')
+    status_parser = commands.add_parser('status', help='服務狀態，或指定工作的狀態與輸出')
+    status_parser.add_argument('job_id', type=int, nargs='?', help='工作編號')
+    status_parser.add_argument('--wait', action='store_true', help='等待工作完成')
+    args = parser.parse_args()
+    base_url = args.url.rstrip('/')
+
+    try:
+        if args.command in ('txt', 'melon'):
+            data = {'source': args.command, 'name': args.name, 'limit': args.limit,
+                    'batch_size': args.batch_size, 'sync': args.sync}
+            if args.command == 'txt':
+                data.update(path=os.path.abspath(args.path), columns=args.columns,
+                            stream=args.stream or None, shard_size=args.shard_size)
+            else:
+                data['chart'] = args.chart
+            job = request(f"{base_url}/jobs", {k: v for k, v in data.items() if v is not None})
+            print(f"已提交工作 {describe(job)}")
+            if args.wait:
+                print(describe(wait(base_url, job['id'])))
+        elif args.command == 'jobs':
+            for job in request(f"{base_url}/jobs"):
+                print(describe(job))
+        elif args.job_id is not None:
+            if args.wait:
+                job = wait(base_url, args.job_id)
+            else:
+                job = request(f"{base_url}/jobs/{args.job_id}")
+                sys.stdout.write(job['log'])
+            print(describe(job))
+        else:
+            status = request(f"{base_url}/status")
+            running = f"#{status['running']}" if status['running'] else "無"
+            print(f"執行中: {running} / 排隊中: {status['queued']} / 共 {status['jobs']} 個工作")
+            if status['quota_remaining'] is not None:
+                print(f"今日配額: 已用 {status['quota_used']}，剩餘 {status['quota_remaining']}")
+            if status.get('pool_searches') is not None:
+                print(f"搜索配額池: 今日還可搜索 {status['pool_searches']} 次")
+    except urllib.error.URLError as e:
+        print(f"無法連線到服務 {base_url}: {e.reason} (請先執行 python playlist_service.py)")
+        sys.exit(1)
+    except RuntimeError as e:
+        print(f"服務回傳錯誤: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n已停止等待 (工作仍在服務中執行)")
+
+
+if __name__ == '__main__':
+    main()
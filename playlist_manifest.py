@@ -0,0 +1,106 @@
+"""播放清單的清單檔 (manifest)：每首歌的來源位置、搜索結果與添加狀態
+
+格式由副檔名決定: .csv 為 CSV (每行一首)，其他為 JSON (包含來源與播放清單資訊)。
+清單檔可以用 manifest_playlist.py 直接建立播放清單，不需要再搜索。
+"""
+import csv
+import json
+import os
+import threading
+from datetime import datetime
+
+MANIFEST_FIELDS = ['num', 'line', 'name', 'artist', 'video_id', 'confidence', 'status']
+# inserted: 已加入播放清單 / failed: 添加或搜索失敗 / resolved: 已找到影片但未添加 / not_found: 找不到影片
+MANIFEST_STATUSES = ['inserted', 'failed', 'resolved', 'not_found']
+
+
+class PlaylistManifest:
+    """收集工作中每首歌的結果 (可在多個執行緒中記錄)，結束時寫入清單檔"""
+
+    def __init__(self, source, playlist_name=None):
+        self.source = source
+        self.playlist_name = playlist_name
+        self.playlist_id = None
+        self.rows = {}
+        self._lock = threading.Lock()
+
+    def record(self, num, track, video_id=None, confidence=None, status='resolved'):
+        """記錄第 num 首的結果 (同一首再次記錄時覆蓋，例如 resolved → inserted)"""
+        row = {
+            'num': num,
+            'line': track.get('line_num'),
+            'name': track['name'],
+            'artist': track['artist'],
+            'video_id': video_id or None,
+            'confidence': round(confidence, 3) if confidence is not None else None,
+            'status': status,
+        }
+        with self._lock:
+            self.rows[num] = row
+
+    def save(self, path):
+        """寫入清單檔，回傳寫入的歌曲數"""
+        with self._lock:
+            rows = [self.rows[num] for num in sorted(self.rows)]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            if path.lower().endswith('.csv'):
+                writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump({
+                    'source': self.source,
+                    'playlist_name': self.playlist_name,
+                    'playlist_id': self.playlist_id,
+                    'exported_at': datetime.now().isoformat(timespec='seconds'),
+                    'tracks': rows,
+                }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return len(rows)
+
+
+def read_manifest(path):
+    """讀取清單檔，回傳 (資訊, 依順序排列的歌曲)；格式錯誤時拋出 ValueError"""
+    if path.lower().endswith('.csv'):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            missing = {'name', 'artist', 'video_id'} - set(reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"{path} 缺少欄位: {', '.join(sorted(missing))}")
+            rows = list(reader)
+        info = {}
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or not isinstance(data.get('tracks'), list):
+            raise ValueError(f"{path} 不是清單檔 (需要 \"tracks\" 列表)")
+        rows = data.pop('tracks')
+        info = data
+
+    tracks = []
+    for position, row in enumerate(rows, 1):
+        tracks.append({
+            'num': _number(row.get('num'), int) or position,
+            'line': _number(row.get('line'), int),
+            'name': row.get('name') or '',
+            'artist': row.get('artist') or '',
+            'video_id': row.get('video_id') or None,
+            'confidence': _number(row.get('confidence'), float),
+            'status': row.get('status') or ('resolved' if row.get('video_id') else 'not_found'),
+        })
+    tracks.sort(key=lambda track: track['num'])
+    return info, tracks
+
+
+def _number(value, kind):
+    # CSV 中的數字是字串，空字串代表沒有值
+    if value is None or value == '':
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
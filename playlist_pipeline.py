@@ -0,0 +1,1119 @@
+import os
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from googleapiclient.errors import HttpError
+
+from search_cache import SearchCache
+from track_catalog import TrackCatalog
+from ytdlp_search import YtDlpSearchEngine
+from rate_limiter import RateLimiter
+from playlist_batch import batch_insert_videos, repair_playlist_order
+from search_pipeline import resolve_tracks
+from retry_policy import RetryPolicy, QuotaExceededError
+from youtube_auth import load_credentials, build_youtube_client
+from playlist_sync import list_playlist_items, plan_playlist_sync, apply_playlist_sync
+from playlist_shards import MAX_PLAYLIST_ITEMS, ShardIndex, iter_shards, shard_title
+from playlist_manifest import PlaylistManifest
+from quota import QuotaMeter, QUOTA_COSTS, DAILY_QUOTA, print_plan
+from quota_pool import QuotaPool, load_profiles
+from metrics import metrics, METRICS_FORMATS
+from ranking import candidates_from_search_response, parse_iso_duration, pick_best
+
+PRIVACY_STATUSES = ['public', 'unlisted', 'private']
+# 單一播放清單添加到上限時的訊息 (--stream 時事先不知道歌曲數量，無法自動分割)
+LIMIT_REACHED = (f"   播放清單已達上限 {MAX_PLAYLIST_ITEMS} 首，停止添加 "
+                 f"(其餘歌曲請用 --shard-size 分割為多個播放清單)")
+# 解析器回傳 UNRESOLVED 時交給下一個解析器 (回傳 None 代表確定找不到)；
+# 搜索出錯而無法確定時，解析器呼叫 pipeline.mark_lookup_failed(num) 後回傳 None
+UNRESOLVED = object()
+
+
+class ManifestResolver:
+    """來源已提供 video_id (例如清單檔)，直接使用而不搜索"""
+
+    def resolve(self, pipeline, track, num, query):
+        video_id = track.get('video_id')
+        # 上次添加或搜索失敗的歌曲重新搜索
+        if not video_id or track.get('status') == 'failed':
+            return UNRESOLVED
+        if track.get('confidence') is not None:
+            pipeline.match_confidence[num] = track['confidence']
+        pipeline.log(f"   清單檔: {video_id}")
+        return video_id
+
+
+class CatalogResolver:
+    """跨來源共用的曲目目錄，找過的歌曲不再搜索"""
+
+    def resolve(self, pipeline, track, num, query):
+        if pipeline.catalog is None:
+            return UNRESOLVED
+        entry = pipeline.catalog.lookup(track)
+        if entry is None:
+            return UNRESOLVED
+        # 目錄中的對應不會過期，這次的信心門檻或長度篩選較嚴格時重新搜索 (新結果會覆蓋舊的對應)
+        if not pipeline.confident(entry['confidence']):
+            pipeline.log(f"   曲目目錄中的影片信心分數不足，重新搜索: {entry['title']}")
+            return UNRESOLVED
+        if not pipeline.duration_allowed(entry['duration']):
+            pipeline.log(f"   曲目目錄中的影片不符合長度篩選，重新搜索: {entry['title']}")
+            return UNRESOLVED
+        pipeline.match_confidence[num] = entry['confidence']
+        pipeline.log(f"   曲目目錄命中: {entry['title']} (ID: {entry['video_id']})")
+        return entry['video_id']
+
+
+class CacheResolver:
+    """搜尋結果快取 (包含 "找不到" 的結果)"""
+
+    def resolve(self, pipeline, track, num, query):
+        if pipeline.cache is None:
+            return UNRESOLVED
+        cached = pipeline.cache.get(query)
+        if cached is None:
+            return UNRESOLVED
+        video_id, video_title, confidence = cached
+        if video_id and not pipeline.confident(confidence):
+            # 快取的結果未達到這次的信心門檻，視為未命中而重新搜索
+            pipeline.log(f"   快取中的影片信心分數不足，重新搜索: {video_title}")
+            return UNRESOLVED
+        if video_id:
+            # 快取會過期 (也可能是排序前沒有信心分數的舊結果)，不寫入不會過期的曲目目錄；
+            # 目錄只記錄新搜索且通過門檻的結果 (choose_candidate)
+            pipeline.match_confidence[num] = confidence
+            pipeline.log(f"   快取命中: {video_title} (ID: {video_id})")
+        else:
+            pipeline.log("   快取命中: 未找到對應影片")
+        return video_id
+
+
+class ApiSearchResolver:
+    """YouTube Data API 搜索，配額不足時之後的歌曲都交給下一個解析器"""
+
+    def __init__(self):
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def resolve(self, pipeline, track, num, query):
+        # 保留這首歌與其他已找到 (或搜索中) 但還沒添加的歌曲所需的添加配額
+        # (批次與分割模式會先搜索完才添加)，在配額用完之前就停止 API 搜索；
+        # 檢查與記錄在同一個鎖中，並行搜索時不會一起越過門檻
+        with self._lock:
+            reserve = QUOTA_COSTS['insert'] * max(1, pipeline.pending_inserts)
+            if not self.exhausted and not pipeline.quota.can_afford('search', reserve=reserve):
+                self.exhausted = True
+                print(f"   剩餘配額不足 ({pipeline.quota.remaining} 單位)，停止以 API 搜索後續歌曲")
+            if self.exhausted:
+                return UNRESOLVED
+            pipeline.quota.charge('search')
+
+        try:
+            candidates = pipeline.api_search(query, charged=True)
+            return pipeline.choose_candidate(track, num, query, candidates)
+
+        except QuotaExceededError as err:
+            print(f"   搜索出錯: YouTube API 配額已用完 ({err})")
+            self.exhausted = True
+            return UNRESOLVED
+        except HttpError as err:
+            print(f"   搜索出錯: {err}")
+            pipeline.mark_lookup_failed(num)
+            return None
+
+
+class PooledSearchResolver:
+    """以配額池中其他專案的設定檔搜索，播放清單擁有者的配額留給寫入
+
+    設定檔的配額用完時輪換到下一個；全部用完後交給下一個解析器 (擁有者的 API 搜索)。
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def resolve(self, pipeline, track, num, query):
+        # 擁有者的配額不夠添加時，找到影片也沒有用
+        if not pipeline.quota.can_afford('insert', count=max(1, pipeline.pending_inserts)):
+            return UNRESOLVED
+        while True:
+            profile = self.pool.acquire('search')
+            if profile is None:
+                return UNRESOLVED
+            try:
+                youtube = profile.youtube
+            except Exception as err:
+                self.pool.disable(profile, f"授權失敗 ({err})")
+                continue
+            try:
+                candidates = pipeline.api_search(query, youtube, profile.quota, charged=True)
+            except QuotaExceededError:
+                self.pool.disable(profile, "的 API 配額已用完")
+                continue
+            except HttpError as err:
+                print(f"   搜索出錯 ({profile.name}): {err}")
+                pipeline.mark_lookup_failed(num)
+                return None
+            return pipeline.choose_candidate(track, num, query, candidates)
+
+
+class YtDlpResolver:
+    """以 yt-dlp 搜尋 (不消耗配額)，放在 API 之後作為配額用完時的備用"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._notified = False
+
+    @property
+    def available(self):
+        return self.engine.available
+
+    def resolve(self, pipeline, track, num, query):
+        if not self._notified:
+            self._notified = True
+            if self.engine.available:
+                print("   改用 yt-dlp 搜尋後續歌曲 (不消耗配額)")
+            else:
+                print("   搜尋配額已用完，且未安裝 yt-dlp。請先執行: pip install yt-dlp")
+        if not self.engine.available:
+            return UNRESOLVED
+        try:
+            pipeline.limiter.acquire()
+            with metrics.timer('search', source='ytdlp'):
+                candidates = self.engine.search(query, pipeline.candidates)
+            return pipeline.choose_candidate(track, num, query, candidates, source="yt-dlp ")
+        except Exception as error:
+            print(f"   yt-dlp 搜尋出錯: {error}")
+        pipeline.mark_lookup_failed(num)
+        return None
+
+
+def default_resolvers(ytdlp, search_pool=None):
+    """預設的解析順序: 清單檔 → 曲目目錄 → 快取 → (配額池) → YouTube API → yt-dlp"""
+    resolvers = [ManifestResolver(), CatalogResolver(), CacheResolver()]
+    if search_pool is not None:
+        resolvers.append(PooledSearchResolver(search_pool))
+    return resolvers + [ApiSearchResolver(), YtDlpResolver(ytdlp)]
+
+
+class PlaylistPipeline:
+    """來源 → 搜索 → 添加 的播放清單建立流程
+
+    來源 (track_sources 中的 MelonChartSource、TxtFileSource 等) 提供 read() / stream()、
+    playlist_name()、description()、name 與 index_path；每首歌依序交給 resolvers
+    找出影片，再以逐首或批次請求添加。並行搜索、快取、批次、配額與分割等功能
+    對所有來源都相同。
+    """
+
+    def __init__(self, cache=None, catalog=None, limiter=None, workers=1, retry=None, quota=None,
+                 ytdlp=None, resolvers=None, youtube=None, search_pool=None,
+                 candidates=5, min_confidence=0.0, min_duration=None, max_duration=None,
+                 quiet=False,
+                 client_secrets_file="client_secret.json",
+                 token_file="token.json"):
+        self.cache = cache
+        self.catalog = catalog
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.workers = workers
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.quota = quota if quota is not None else QuotaMeter(None)
+        # 每次搜索取得的候選數量與排序條件 (search().list 不論 maxResults 都是 100 單位)
+        self.candidates = candidates
+        self.min_confidence = min_confidence
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.match_confidence = {}
+        # quiet 時不列出每首歌曲的進度 (錯誤與未找到的歌曲仍會列出)
+        self.quiet = quiet
+        # 配額用完時的備用搜尋，YoutubeDL 實例在整個工作中重複使用
+        self.ytdlp = ytdlp if ytdlp is not None else YtDlpSearchEngine(pool_size=workers)
+        # 其他專案的搜索配額 (quota_pool.QuotaPool)，寫入仍使用 self.quota 與 self.youtube
+        self.search_pool = search_pool
+        if resolvers is None:
+            resolvers = default_resolvers(self.ytdlp, search_pool)
+        self.resolvers = resolvers
+        self.client_secrets_file = client_secrets_file
+        self.token_file = token_file
+        # YouTube 客戶端延遲到第一次呼叫 API 時才建立 (服務模式中傳入共用的客戶端)
+        self._youtube = youtube
+        self._client_lock = threading.Lock()
+        self.journal = None
+        self.failed_lookups = set()
+        # 已找到影片但還沒添加的歌曲數 = 找到的數量 + 搜索中的數量 - 這個工作已記錄的添加次數
+        self._resolved_videos = 0
+        self._lookups = 0
+        self._inserts_before = 0
+        self._pending_lock = threading.Lock()
+        # 每個工作的設定 (由 run 設定)
+        self.manifest = None
+        self.privacy = 'public'
+
+    @property
+    def youtube(self):
+        """第一次呼叫 API 時才進行授權並建立 YouTube 客戶端"""
+        with self._client_lock:
+            if self._youtube is None:
+                self._youtube = self.get_youtube_client()
+        return self._youtube
+
+    def log(self, message):
+        """列出每首歌曲的進度訊息，quiet 時略過"""
+        if not self.quiet:
+            print(message)
+
+    def get_youtube_client(self):
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+
+        credentials = load_credentials(self.client_secrets_file, self.token_file)
+        return build_youtube_client(credentials)
+
+    def close(self):
+        """關閉 yt-dlp、快取與曲目目錄"""
+        self.ytdlp.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.catalog is not None:
+            self.catalog.close()
+
+    def print_tracks(self, tracks):
+        """列出歌曲 (dry run 用，不需要授權)"""
+        count = 0
+        for count, track in enumerate(tracks, 1):
+            print(f"{count}. {track['name']} - {track['artist']}")
+        print(f"共 {count} 首歌曲")
+
+    def print_plan(self, tracks, create_playlist=True):
+        """估算工作需要的 API 配額 (曲目目錄與快取中已有的搜索不計)，不需要授權"""
+        cache_hits = 0
+        cache_not_found = 0
+        track_count = 0
+        for track in tracks:
+            track_count += 1
+            if track.get('video_id'):
+                cache_hits += 1
+            elif self.catalog_hit(track):
+                cache_hits += 1
+            elif self.cache is not None:
+                cached = self.cache.peek("{} {}".format(track['name'], track['artist']))
+                if cached is not None:
+                    if not cached[0]:
+                        cache_not_found += 1
+                    elif self.confident(cached[2]):
+                        # 未達到信心門檻的快取結果會重新搜索
+                        cache_hits += 1
+
+        fallback = any(isinstance(resolver, YtDlpResolver) and resolver.available
+                       for resolver in self.resolvers)
+        print_plan(self.quota, track_count, cache_hits, cache_not_found,
+                   create_playlist=create_playlist,
+                   pool_searches=self.search_pool.affordable('search') if self.search_pool else 0,
+                   fallback="搜索會在配額用完之前改用 yt-dlp (不消耗配額)" if fallback else None)
+
+    def catalog_hit(self, track):
+        """曲目目錄中有符合這次門檻與篩選的對應 (估算配額用)"""
+        entry = self.catalog.lookup(track) if self.catalog is not None else None
+        return (entry is not None and self.confident(entry['confidence'])
+                and self.duration_allowed(entry['duration']))
+
+    def search_youtube_video(self, track, num):
+        """在YouTube搜索對應的影片 (依序嘗試各解析器)"""
+        self.log(f"{num}. 搜索: {track['name']} - {track['artist']}")
+        query = "{} {}".format(track['name'], track['artist'])
+        for resolver in self.resolvers:
+            video_id = resolver.resolve(self, track, num, query)
+            if video_id is not UNRESOLVED:
+                return video_id
+        # 所有解析器都無法處理 (配額用完且沒有 yt-dlp 等)，不代表確定找不到
+        self.mark_lookup_failed(num)
+        return None
+
+    def mark_lookup_failed(self, num):
+        """記錄第 num 首搜索失敗 (與確定找不到不同，同步時不能當作要刪除)"""
+        self.failed_lookups.add(num)
+
+    def api_search(self, query, youtube=None, quota=None, charged=False):
+        """以 search().list 搜索並回傳候選影片 (需要長度篩選時一併取得長度)
+
+        youtube 與 quota 預設為播放清單擁有者的客戶端與配額記錄，配額池搜索時傳入設定檔的；
+        charged 為 True 時搜索的用量已由配額池記錄。
+        """
+        youtube = youtube if youtube is not None else self.youtube
+        quota = quota if quota is not None else self.quota
+        self.limiter.acquire()
+        if not charged:
+            quota.charge('search')
+        request = youtube.search().list(
+            part="snippet",
+            q=query,
+            type="video",
+            maxResults=self.candidates
+        )
+        with metrics.timer('search', source='api'):
+            response = self.retry.execute(request)
+        candidates = candidates_from_search_response(response)
+        if candidates and (self.min_duration or self.max_duration):
+            self.fetch_durations(candidates, youtube, quota)
+        return candidates
+
+    def fetch_durations(self, candidates, youtube=None, quota=None):
+        """以 videos().list 取得候選影片的長度 (1 單位)，用於長度篩選"""
+        youtube = youtube if youtube is not None else self.youtube
+        quota = quota if quota is not None else self.quota
+        try:
+            self.limiter.acquire()
+            quota.charge('videos')
+            request = youtube.videos().list(
+                part="contentDetails",
+                id=",".join(candidate['id'] for candidate in candidates)
+            )
+            with metrics.timer('search', source='videos'):
+                response = self.retry.execute(request)
+        except HttpError as err:
+            print(f"   取得影片長度出錯: {err}")
+            return
+        durations = {item['id']: parse_iso_duration(item['contentDetails'].get('duration'))
+                     for item in response.get('items', [])}
+        for candidate in candidates:
+            candidate['duration'] = durations.get(candidate['id'])
+
+    def confident(self, confidence):
+        """之前的結果是否達到這次的 min_confidence (有門檻時沒有信心分數的舊結果視為未達到)"""
+        if not self.min_confidence:
+            return True
+        return confidence is not None and confidence >= self.min_confidence
+
+    def duration_allowed(self, duration):
+        """之前的結果是否符合這次的長度篩選 (有篩選時長度不明視為不符合)"""
+        if not (self.min_duration or self.max_duration):
+            return True
+        if duration is None:
+            return False
+        return not ((self.min_duration and duration < self.min_duration)
+                    or (self.max_duration and duration > self.max_duration))
+
+    def choose_candidate(self, track, num, query, candidates, source=""):
+        """從候選影片中選出最符合的一個，信心分數過低時視為未找到"""
+        best, confidence = pick_best(track, candidates, self.min_duration, self.max_duration)
+        if best is None or confidence < self.min_confidence:
+            if best is None:
+                print(f"   {source}未找到對應影片: {query}")
+            else:
+                print(f"   {source}最佳結果信心分數過低 ({confidence:.2f}): {best['title']}")
+            if self.cache is not None:
+                self.cache.put(query, None)
+            return None
+
+        self.log(f"   {source}找到: {best['title']} (ID: {best['id']}, 信心 {confidence:.2f})")
+        if num is not None:
+            self.match_confidence[num] = confidence
+        if self.cache is not None:
+            self.cache.put(query, best['id'], best['title'], confidence)
+        if self.catalog is not None:
+            self.catalog.add(track, best['id'], best['title'], confidence, best.get('duration'))
+        return best['id']
+
+    def create_youtube_playlist(self, title, description=""):
+        """創建YouTube播放清單"""
+        if not self.quota.can_afford('playlist'):
+            print(f"剩餘配額不足 ({self.quota.remaining} 單位)，無法創建播放清單")
+            return None
+        try:
+            self.limiter.acquire()
+            self.quota.charge('playlist')
+            request = self.youtube.playlists().insert(
+                part="snippet,status",
+                body={
+                    "snippet": {
+                        "title": title,
+                        "description": description
+                    },
+                    "status": {
+                        "privacyStatus": self.privacy
+                    }
+                }
+            )
+            response = self.retry.execute(request)
+
+            playlist_id = response['id']
+            playlist_title = response['snippet']['title']
+            playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
+
+            print('=' * 50)
+            print("播放清單創建成功!")
+            print(f"名稱: {playlist_title}")
+            print(f"網址: {playlist_url}")
+            print('=' * 50)
+
+            return playlist_id
+
+        except QuotaExceededError as err:
+            print(f"創建播放清單出錯: YouTube API 配額已用完 ({err})")
+            return None
+        except HttpError as err:
+            print(f"創建播放清單出錯: {err}")
+            return None
+
+    def add_video_to_playlist(self, video_id, playlist_id):
+        """將影片添加到播放清單"""
+        if not self.quota.can_afford('insert'):
+            print(f"   剩餘配額不足 ({self.quota.remaining} 單位)，無法添加影片")
+            return False
+        try:
+            self.limiter.acquire()
+            self.quota.charge('insert')
+            request = self.youtube.playlistItems().insert(
+                part="snippet",
+                body={
+                    'snippet': {
+                        'playlistId': playlist_id,
+                        'resourceId': {
+                            'kind': 'youtube#video',
+                            'videoId': video_id
+                        }
+                    }
+                }
+            )
+            with metrics.timer('insert'):
+                self.retry.execute(request)
+            return True
+
+        except QuotaExceededError as err:
+            print(f"   添加影片出錯: YouTube API 配額已用完 ({err})")
+            return False
+        except HttpError as err:
+            print(f"   添加影片出錯: {err}")
+            if err.resp.status in [409]:  # 影片已存在
+                print("   影片已存在於播放清單中")
+                return True
+            return False
+
+    def add_videos_to_playlist_batch(self, video_ids, playlist_id, batch_size=50,
+                                     start_position=0):
+        """以批次請求將多個影片依序添加到播放清單，回傳每個影片是否成功"""
+        return batch_insert_videos(self.youtube, playlist_id, video_ids,
+                                   batch_size=batch_size, limiter=self.limiter,
+                                   retry=self.retry, start_position=start_position,
+                                   quota=self.quota, verbose=not self.quiet)
+
+    def repair_playlist_order(self, playlist_id, video_ids, start_position=0):
+        """批次添加完成後確認影片順序，位置不對的項目移回正確位置"""
+        try:
+            return repair_playlist_order(self.youtube, playlist_id, video_ids, start_position,
+                                         self.retry, limiter=self.limiter, quota=self.quota)
+        except HttpError as err:
+            print(f"   無法讀取播放清單以確認順序: {err}")
+            return 0
+
+    def search_with_journal(self, track, num):
+        """有工作記錄時沿用上次找到的影片，不重複搜索"""
+        if self.journal is not None:
+            record = self.journal.get(num, track)
+            if record and record.get('video_id'):
+                if record.get('status') != 'inserted':
+                    self.reserve_insert()
+                return record['video_id']
+        video_id = self.track_lookup(track, num)
+        if video_id and self.journal is not None:
+            self.journal.record_track(num, track, video_id, 'resolved')
+        return video_id
+
+    def track_lookup(self, track, num):
+        """搜索之後要添加的歌曲；搜索期間與找到影片後都保留它的添加配額"""
+        with self._pending_lock:
+            self._lookups += 1
+        video_id = None
+        try:
+            video_id = self.search_youtube_video(track, num)
+            return video_id
+        finally:
+            with self._pending_lock:
+                self._lookups -= 1
+                if video_id:
+                    self._resolved_videos += 1
+
+    def reserve_insert(self):
+        """記錄一首已找到影片、之後要添加的歌曲 (例如工作記錄中的搜索結果)"""
+        with self._pending_lock:
+            self._resolved_videos += 1
+
+    @property
+    def pending_inserts(self):
+        """已找到影片 (或搜索中) 但還沒添加 (或嘗試添加) 的歌曲數"""
+        inserted = self.quota.session.get('insert', 0) - self._inserts_before
+        with self._pending_lock:
+            return max(0, self._resolved_videos + self._lookups - inserted)
+
+    def is_already_inserted(self, num, track):
+        """上次執行時是否已將這首歌加入播放清單"""
+        if self.journal is None:
+            return False
+        record = self.journal.get(num, track)
+        return record is not None and record.get('status') == 'inserted'
+
+    def record_result(self, num, track, video_id, status):
+        """記錄這首歌的結果到清單檔 (有指定 --manifest 時)"""
+        if self.manifest is not None:
+            self.manifest.record(num, track, video_id, self.match_confidence.get(num), status)
+
+    def record_missing(self, num, track):
+        """記錄沒有影片的歌曲；搜索失敗記為 failed (之後重新搜索)，確定找不到才記為 not_found"""
+        self.record_result(num, track, None, 'failed' if num in self.failed_lookups else 'not_found')
+
+    def print_stats(self):
+        if self.catalog is not None:
+            self.catalog.print_stats()
+        if self.cache is not None:
+            self.cache.print_stats()
+        self.quota.print_stats()
+        if self.search_pool is not None:
+            self.search_pool.print_stats()
+
+    def fill_shard(self, part, items, index, description, batch_size=0):
+        """建立 (或沿用) 第 part 個播放清單並依序添加 items，回傳成功添加的數量
+
+        每處理一批就更新索引，中斷後可從上次的位置繼續。
+        """
+        name = index.data['name']
+        entry = index.get(part) or {}
+        playlist_id = entry.get('playlist_id')
+        processed = entry.get('processed', 0)
+        inserted = entry.get('inserted', 0)
+        if not playlist_id:
+            playlist_id = self.create_youtube_playlist(shard_title(name, part), description)
+            if not playlist_id:
+                print(f"第 {part} 個播放清單創建失敗")
+                return None
+        index.update(part, title=shard_title(name, part), playlist_id=playlist_id,
+                     url=f"https://www.youtube.com/playlist?list={playlist_id}",
+                     first_num=items[0][0], last_num=items[-1][0], total=len(items),
+                     processed=processed, inserted=inserted)
+
+        pending = items[processed:]
+        start_position = inserted
+        added = []
+        while pending:
+            affordable = self.quota.affordable('insert')
+            if not affordable:
+                print(f"   第 {part} 個播放清單: 剩餘配額不足，停止添加 (之後可用 --resume 繼續)")
+                break
+            chunk = pending[:min(batch_size or 1, affordable)]
+            video_ids = [video_id for _, _, video_id in chunk]
+            if batch_size:
+                results = self.add_videos_to_playlist_batch(video_ids, playlist_id, batch_size,
+                                                            start_position=inserted)
+            else:
+                results = [self.add_video_to_playlist(video_ids[0], playlist_id)]
+            for (num, track, video_id), ok in zip(chunk, results):
+                self.record_result(num, track, video_id, 'inserted' if ok else 'failed')
+                if ok:
+                    added.append(video_id)
+            processed += len(chunk)
+            inserted += sum(results)
+            index.update(part, processed=processed, inserted=inserted)
+            pending = pending[len(chunk):]
+        if batch_size:
+            self.repair_playlist_order(playlist_id, added, start_position)
+
+        for num, track, video_id in pending:
+            self.record_result(num, track, video_id, 'resolved')
+        print(f"   第 {part} 個播放清單: 已添加 {inserted}/{len(items)} 首")
+        return inserted
+
+    def create_sharded_playlists(self, tracks, playlist_name, description, source, index,
+                                 shard_size=MAX_PLAYLIST_ITEMS, batch_size=0, resume=False,
+                                 shard_workers=2):
+        """將歌曲分割為多個 "名稱 - part N" 播放清單
+
+        搜索結果依序每 shard_size 首分成一組，建立與添加在 shard_workers 個
+        執行緒中並行進行 (仍共用 self.limiter 的請求頻率)，結果寫入索引檔。
+        """
+        skip_parts, skip_through = 0, 0
+        if resume and index.load():
+            skip_parts, skip_through = index.completed_prefix()
+            print(f"繼續上次的分割工作: {index.data['name']} (已完成 {skip_parts} 個播放清單)")
+        else:
+            index.start(playlist_name, source, shard_size)
+        shard_size = index.data['shard_size']
+
+        def search(track, num):
+            # 已完成的播放清單中的歌曲不需要再搜索
+            if num <= skip_through:
+                return None
+            return self.track_lookup(track, num)
+
+        def report_missing(num, track):
+            print(f"   ✗ 第 {num} 首未找到對應影片: {track['name']} - {track['artist']}")
+            self.record_missing(num, track)
+
+        resolved = resolve_tracks(search, tracks, workers=self.workers)
+        shards = iter_shards(resolved, shard_size, start_part=skip_parts + 1,
+                             skip_through=skip_through, on_missing=report_missing)
+        try:
+            running = deque()
+            with ThreadPoolExecutor(max_workers=shard_workers) as executor:
+                for part, items in shards:
+                    if not self.quota.can_afford('insert'):
+                        print("\n剩餘配額不足，停止建立新的播放清單 (之後可用 --resume 繼續)")
+                        break
+                    print(f"\n第 {part} 個播放清單: {len(items)} 首 (第 {items[0][0]}-{items[-1][0]} 首)")
+                    running.append(executor.submit(self.fill_shard, part, items, index,
+                                                   description, batch_size))
+                    # 同時最多 shard_workers 個播放清單在處理中，避免搜索結果堆積在記憶體
+                    if len(running) >= shard_workers and running.popleft().result() is None:
+                        break
+                for future in running:
+                    future.result()
+        finally:
+            resolved.close()
+
+        print("\n" + "=" * 50)
+        print(f"播放清單創建完成! 共 {len(index.playlists)} 個播放清單")
+        for entry in index.playlists:
+            print(f"{entry['title']}: {entry.get('inserted', 0)}/{entry['total']} 首 - {entry['url']}")
+        print(f"播放清單索引: {index.path}")
+        self.print_stats()
+        print("=" * 50)
+
+    def sync_playlist(self, playlist_id, tracks):
+        """將現有播放清單同步為 tracks 的內容與順序，只執行必要的新增/刪除/移動"""
+        print(f"\n開始搜索 {len(tracks)} 首歌曲...")
+        self.failed_lookups.clear()
+        video_ids = []
+        for num, track, video_id in resolve_tracks(self.search_youtube_video, tracks,
+                                                   workers=self.workers):
+            if video_id:
+                video_ids.append(video_id)
+                self.record_result(num, track, video_id, 'resolved')
+            elif num in self.failed_lookups:
+                print(f"   ✗ 第 {num} 首搜索失敗: {track['name']} - {track['artist']}")
+                self.record_result(num, track, None, 'failed')
+            else:
+                print(f"   ✗ 第 {num} 首未找到對應影片: {track['name']} - {track['artist']}")
+                self.record_result(num, track, None, 'not_found')
+
+        # 搜索失敗的歌曲無法確定目標內容，同步會刪除它們在播放清單中現有的項目
+        if self.failed_lookups:
+            print(f"\n有 {len(self.failed_lookups)} 首歌曲搜索失敗，為避免刪除現有的歌曲，"
+                  f"已取消同步 (播放清單沒有任何修改，請之後再試)")
+            self.print_stats()
+            return
+
+        print(f"\n正在讀取播放清單 {playlist_id} 的現有歌曲...")
+        try:
+            current = list_playlist_items(self.youtube, playlist_id, self.retry, self.limiter,
+                                          self.quota)
+        except HttpError as err:
+            print(f"讀取播放清單出錯: {err}")
+            return
+
+        ops = plan_playlist_sync(current, video_ids)
+        counts = {action: sum(1 for op in ops if op[0] == action)
+                  for action in ['insert', 'delete', 'move']}
+        print(f"現有 {len(current)} 首，目標 {len(video_ids)} 首: "
+              f"新增 {counts['insert']} / 刪除 {counts['delete']} / 移動 {counts['move']}")
+
+        result = apply_playlist_sync(self.youtube, playlist_id, ops, self.retry,
+                                     self.limiter, self.quota)
+        if result is None:
+            self.print_stats()
+            return
+        done, failed = result
+
+        print("\n" + "=" * 50)
+        print("播放清單同步完成!")
+        print(f"完成操作: {done}/{len(ops)}" + (f" (失敗 {failed})" if failed else ""))
+        print(f"播放清單網址: https://www.youtube.com/playlist?list={playlist_id}")
+        self.print_stats()
+        print("=" * 50)
+
+    def run(self, source, playlist_name=None, batch_size=0, dry_run=False, sync_playlist_id=None,
+            journal=None, resume=False, plan=False, stream=False, shard_size=0, shard_index=None,
+            shard_workers=2, manifest=None, privacy='public'):
+        """從 source 建立 (或同步) YouTube 播放清單，回傳播放清單 ID (分割時為 None)
+
+        stream 為 True 時邊讀取來源邊搜索/添加，不先把所有歌曲讀進記憶體。
+        shard_size 大於 0 時分割為多個播放清單，索引寫入 shard_index。
+        manifest 為清單檔路徑時，結束 (或中斷) 後匯出每首歌的影片與添加狀態。
+        """
+        if dry_run or plan:
+            tracks = source.stream()
+            if dry_run:
+                self.print_tracks(tracks)
+            else:
+                self.print_plan(tracks, create_playlist=not sync_playlist_id)
+            return
+
+        self.privacy = privacy
+        self._resolved_videos = 0
+        self._lookups = 0
+        self._inserts_before = self.quota.session.get('insert', 0)
+        self.manifest = PlaylistManifest(source.name, playlist_name) if manifest else None
+        try:
+            return self.build_playlist(source, playlist_name, batch_size, sync_playlist_id, journal,
+                                       resume, stream, shard_size, shard_index, shard_workers)
+        finally:
+            if self.manifest is not None:
+                count = self.manifest.save(manifest)
+                print(f"清單檔已匯出: {manifest} ({count} 首)")
+                self.manifest = None
+
+    def build_playlist(self, source, playlist_name, batch_size, sync_playlist_id, journal, resume,
+                       stream, shard_size, shard_index, shard_workers):
+        """run 的主要流程 (同步、分割或建立單一播放清單)"""
+        # 同步模式: 更新現有播放清單，而不是創建新的
+        if sync_playlist_id:
+            tracks = source.read()
+            if tracks:
+                self.sync_playlist(sync_playlist_id, tracks)
+            return sync_playlist_id
+
+        if stream:
+            tracks = source.stream()
+            first = next(tracks, None)
+            if first is None:
+                return
+            tracks = itertools.chain([first], tracks)
+            total_count = None
+        else:
+            tracks = source.read()
+            if not tracks:
+                return
+            total_count = len(tracks)
+
+        # 設置播放清單名稱和描述
+        if playlist_name is None:
+            playlist_name = source.playlist_name()
+        description = source.description()
+        if self.manifest is not None:
+            self.manifest.playlist_name = playlist_name
+
+        # 超過單一播放清單上限時自動分割，避免之後每首都添加失敗
+        # (--stream 時不知道總數，添加到上限後停止)
+        if not shard_size and total_count is not None and total_count > MAX_PLAYLIST_ITEMS:
+            print(f"歌曲數量超過播放清單上限 {MAX_PLAYLIST_ITEMS} 首，將自動分割為多個播放清單")
+            shard_size = MAX_PLAYLIST_ITEMS
+        if shard_size:
+            index = ShardIndex(shard_index or source.index_path)
+            self.create_sharded_playlists(tracks, playlist_name, description, source.name,
+                                          index, min(shard_size, MAX_PLAYLIST_ITEMS),
+                                          batch_size, resume, shard_workers)
+            return
+
+        # 繼續上次中斷的工作，或創建新的播放清單
+        self.journal = journal
+        playlist_id = None
+        if journal is not None and resume:
+            if journal.load():
+                playlist_id = journal.job['playlist_id']
+                done = sum(1 for record in journal.tracks.values() if record['status'] == 'inserted')
+                print(f"繼續上次的工作: 播放清單 {playlist_id} (已添加 {done} 首)")
+            else:
+                print("沒有可繼續的工作記錄，將創建新的播放清單")
+
+        if not playlist_id:
+            playlist_id = self.create_youtube_playlist(playlist_name, description)
+            if not playlist_id:
+                print("播放清單創建失敗")
+                return
+            if journal is not None:
+                journal.start(playlist_id, source.name, playlist_name)
+        if self.manifest is not None:
+            self.manifest.playlist_id = playlist_id
+
+        # 搜索並添加每首歌曲
+        success_count = 0
+        processed = 0
+
+        if total_count is None:
+            print("\n開始逐行處理歌曲...")
+        else:
+            print(f"\n開始處理 {total_count} 首歌曲...")
+
+        # 搜索在執行緒池中並行進行 (workers > 1)，結果依原順序交給添加階段
+        resolved = resolve_tracks(self.search_with_journal, tracks, workers=self.workers)
+
+        try:
+            if batch_size:
+                # 先取得所有搜索結果，再以批次請求依序加入播放清單
+                pending = []
+                for num, track, video_id in resolved:
+                    processed = num
+                    if self.is_already_inserted(num, track):
+                        success_count += 1
+                        self.record_result(num, track, video_id, 'inserted')
+                    elif video_id and success_count + len(pending) >= MAX_PLAYLIST_ITEMS:
+                        self.record_result(num, track, video_id, 'resolved')
+                        print(LIMIT_REACHED)
+                        break
+                    elif video_id:
+                        pending.append((num, track, video_id))
+                    else:
+                        print(f"   ✗ 第 {num} 首未找到對應影片: {track['name']} - {track['artist']}")
+                        self.record_missing(num, track)
+                # 搜索階段已結束 (可能因達到上限提前停止)，取消尚未開始的搜索
+                resolved.close()
+
+                affordable = self.quota.affordable('insert')
+                if len(pending) > affordable:
+                    print(f"\n剩餘配額只夠添加 {affordable} 首，其餘 {len(pending) - affordable} 首"
+                          f"請之後用 --resume 繼續")
+                    for num, track, video_id in pending[affordable:]:
+                        self.record_result(num, track, video_id, 'resolved')
+                    pending = pending[:affordable]
+
+                print(f"\n以批次請求添加 {len(pending)} 首歌曲...")
+                results = self.add_videos_to_playlist_batch(
+                    [video_id for _, _, video_id in pending], playlist_id, batch_size,
+                    start_position=success_count)
+                for (num, track, video_id), ok in zip(pending, results):
+                    self.record_result(num, track, video_id, 'inserted' if ok else 'failed')
+                    if ok and journal is not None:
+                        journal.record_track(num, track, video_id, 'inserted')
+                self.repair_playlist_order(
+                    playlist_id, [video_id for (_, _, video_id), ok in zip(pending, results) if ok],
+                    start_position=success_count)
+                success_count += sum(results)
+            else:
+                for num, track, video_id in resolved:
+                    processed = num
+                    self.log(f"\n進度: {num}/{total_count or '?'}")
+
+                    if self.is_already_inserted(num, track):
+                        success_count += 1
+                        self.record_result(num, track, video_id, 'inserted')
+                        self.log("   ✓ 上次執行時已添加到播放清單")
+                    elif video_id and not self.quota.can_afford('insert'):
+                        self.record_result(num, track, video_id, 'resolved')
+                        print("   剩餘配額不足，停止添加 (之後可用 --resume 繼續)")
+                        break
+                    elif video_id and success_count >= MAX_PLAYLIST_ITEMS:
+                        self.record_result(num, track, video_id, 'resolved')
+                        print(LIMIT_REACHED)
+                        break
+                    elif video_id:
+                        # 添加到播放清單 (請求頻率由 self.limiter 控制)
+                        if self.add_video_to_playlist(video_id, playlist_id):
+                            success_count += 1
+                            self.record_result(num, track, video_id, 'inserted')
+                            if journal is not None:
+                                journal.record_track(num, track, video_id, 'inserted')
+                            self.log("   ✓ 成功添加到播放清單")
+                        else:
+                            self.record_result(num, track, video_id, 'failed')
+                            print("   ✗ 添加到播放清單失敗")
+                    else:
+                        self.record_missing(num, track)
+                        print("   ✗ 未找到對應影片")
+        finally:
+            # 提前停止 (配額不足或達到上限) 時取消尚未開始的搜索
+            resolved.close()
+
+        print("\n" + "=" * 50)
+        print("播放清單創建完成!")
+        print(f"成功添加: {success_count}/{total_count or processed} 首歌曲")
+        print(f"播放清單網址: https://www.youtube.com/playlist?list={playlist_id}")
+        self.print_stats()
+        print("=" * 50)
+        return playlist_id
+
+
+def add_pipeline_arguments(parser, token_file, journal_help, dry_run_help):
+    """加入兩個命令列工具共用的選項"""
+    add_settings_arguments(parser, token_file)
+    add_job_arguments(parser, journal_help, dry_run_help)
+
+
+def add_settings_arguments(parser, token_file):
+    """流程設定的選項 (快取、限速、並行、重試、配額、指標等)，服務模式也使用"""
+    parser.add_argument(
+        '--cache-file',
+        type=str,
+        default='search_cache.db',
+        help='搜尋結果快取檔案 (預設: search_cache.db)'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=7,
+        help='搜尋結果快取保存天數 (預設: 7)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='停用搜尋結果快取'
+    )
+    parser.add_argument(
+        '--catalog-file',
+        type=str,
+        default='track_catalog.db',
+        help='跨來源共用的曲目目錄，找過的歌曲不再搜索 (預設: track_catalog.db)'
+    )
+    parser.add_argument(
+        '--no-catalog',
+        action='store_true',
+        help='停用曲目目錄'
+    )
+    parser.add_argument(
+        '--refresh-catalog',
+        action='store_true',
+        help='不使用曲目目錄中的對應，以新的搜索結果覆蓋 (單首可用 track_catalog.py --evict 刪除)'
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=2.0,
+        help='每秒最多 API 請求數 (預設: 2，0 = 不限速)'
+    )
+    parser.add_argument(
+        '--workers', '-w',
+        type=int,
+        default=1,
+        help='並行搜索的執行緒數量 (預設: 1)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=5,
+        help='API 請求遇到暫時性錯誤時的最多重試次數 (預設: 5)'
+    )
+    parser.add_argument(
+        '--retry-budget',
+        type=float,
+        default=300,
+        help='整個執行過程中重試等待的總秒數上限 (預設: 300)'
+    )
+    parser.add_argument(
+        '--token-file',
+        type=str,
+        default=token_file,
+        help='OAuth 憑證保存位置，之後執行不需再開啟瀏覽器授權 (預設: %s)' % token_file
+    )
+    parser.add_argument(
+        '--candidates',
+        type=int,
+        default=5,
+        help='每次搜索取得的候選影片數量，從中挑選最符合的影片 (預設: 5，1 = 直接用第一個結果)'
+    )
+    parser.add_argument(
+        '--min-confidence',
+        type=float,
+        default=0.0,
+        help='最低信心分數 (0~1)，低於此分數視為未找到 (預設: 0)'
+    )
+    parser.add_argument(
+        '--min-duration',
+        type=int,
+        help='影片最短秒數，設定長度篩選時每次搜索會多用 1 單位配額'
+    )
+    parser.add_argument(
+        '--max-duration',
+        type=int,
+        help='影片最長秒數，設定長度篩選時每次搜索會多用 1 單位配額'
+    )
+    parser.add_argument(
+        '--quota-file',
+        type=str,
+        default='quota_usage.json',
+        help='每日 API 配額用量記錄檔 (預設: quota_usage.json)'
+    )
+    parser.add_argument(
+        '--daily-quota',
+        type=int,
+        default=DAILY_QUOTA,
+        help='每日 API 配額上限 (預設: %d)' % DAILY_QUOTA
+    )
+    parser.add_argument(
+        '--profiles',
+        type=str,
+        help='搜索配額池的設定檔清單 (JSON，格式見 quota_pool.py)；搜索分散到這些設定檔，'
+             '播放清單的寫入仍使用 --token-file 的帳號'
+    )
+    parser.add_argument(
+        '--quiet', '-q',
+        action='store_true',
+        help='不列出每首歌曲的進度，只顯示錯誤與最後的統計 (大量歌曲時可減少輸出)'
+    )
+    parser.add_argument(
+        '--metrics-file',
+        type=str,
+        help='執行結束時將各階段耗時、延遲分佈、HTTP 錯誤與快取命中率寫入此檔案'
+    )
+    parser.add_argument(
+        '--metrics-format',
+        choices=METRICS_FORMATS,
+        help='指標檔案格式 (預設由副檔名判斷: .prom 為 Prometheus 文字格式，其他為 JSON lines)'
+    )
+
+
+def add_job_arguments(parser, journal_help, dry_run_help):
+    """單一工作的選項 (批次、同步、繼續、估算等)"""
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=0,
+        help='以批次請求添加歌曲，每批數量 (預設: 0 = 逐首添加，建議 50)'
+    )
+    parser.add_argument(
+        '--sync',
+        type=str,
+        metavar='PLAYLIST_ID',
+        help='同步到現有的播放清單 (只新增/刪除/移動有變動的歌曲)，而不是創建新的播放清單'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='繼續上次中斷的工作 (沿用同一個播放清單，不重複搜索或添加已完成的歌曲)'
+    )
+    parser.add_argument(
+        '--journal',
+        type=str,
+        help=journal_help
+    )
+    parser.add_argument(
+        '--manifest',
+        type=str,
+        help='結束後將每首歌的來源行號、影片 ID、信心分數與添加狀態匯出到清單檔 '
+             '(.json 或 .csv，可用 manifest_playlist.py 直接重建播放清單)'
+    )
+    parser.add_argument(
+        '--privacy',
+        choices=PRIVACY_STATUSES,
+        default='public',
+        help='新播放清單的公開狀態 (預設: public)'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='只估算這個工作需要的 API 配額 (已快取的搜索不計)，不實際執行'
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help=dry_run_help
+    )
+
+
+def pipeline_options(args):
+    """由命令列參數建立 PlaylistPipeline 的設定 (會開啟快取與曲目目錄)"""
+    search_pool = None
+    if args.profiles:
+        try:
+            search_pool = QuotaPool(load_profiles(args.profiles))
+        except (OSError, ValueError) as e:
+            raise SystemExit(f"設定檔清單讀取失敗: {e}")
+    cache = None
+    if not args.no_cache:
+        cache = SearchCache(args.cache_file, ttl=args.cache_ttl * 24 * 3600)
+    catalog = None if args.no_catalog else TrackCatalog(args.catalog_file, refresh=args.refresh_catalog)
+    return dict(cache=cache, catalog=catalog, search_pool=search_pool,
+                limiter=RateLimiter(args.rate),
+                workers=args.workers,
+                retry=RetryPolicy(args.max_retries, total_budget=args.retry_budget),
+                token_file=args.token_file,
+                quota=QuotaMeter(args.quota_file, args.daily_quota),
+                candidates=args.candidates,
+                min_confidence=args.min_confidence,
+                min_duration=args.min_duration,
+                max_duration=args.max_duration,
+                quiet=args.quiet)
@@ -0,0 +1,336 @@
+"""常駐的播放清單服務
+
+用法: python playlist_service.py [--port 8765] [--workers 4] [--rate 2] ...
+      python playlist_client.py txt rank.txt --name "我的清單" --wait
+
+服務啟動時授權一次並建立 YouTube 客戶端，之後的工作共用同一個客戶端、
+HTTP 連線池、搜尋快取、曲目目錄、排行榜快取、yt-dlp 實例、限速器、配額記錄與搜索配額池。
+工作依提交順序逐一執行，每個工作的輸出保存在工作記錄中，可由客戶端讀取。
+
+HTTP API (只監聽本機):
+- POST /jobs          提交工作 {"source": "txt", "path": ...} 或 {"source": "melon", "chart": ...}
+- GET  /jobs          所有工作
+- GET  /jobs/<id>     工作狀態與輸出 (?offset=N 只回傳第 N 個字元之後的輸出)
+- GET  /status        佇列與配額狀態
+- GET  /metrics       Prometheus 文字格式的執行指標
+"""
+import argparse
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from chart_cache import ChartCache
+from create_yt_playlist import MelonToYouTubePlaylist
+from melon_scraper import resolve_chart_url
+from metrics import metrics
+from playlist_pipeline import PlaylistPipeline, add_settings_arguments, pipeline_options
+from track_reader import COLUMN_ORDERS
+from txt_playlist import TxtToYouTubePlaylist
+from ytdlp_search import YtDlpSearchEngine
+
+DEFAULT_PORT = 8765
+SOURCES = ['txt', 'melon']
+
+
+def _parse_bool(value):
+    """把 JSON 的布林值或 "true"/"false"/"1"/"0" 之類的字串轉為 bool，其他值拋出 ValueError"""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('true', '1', 'yes', 'on'):
+            return True
+        if text in ('false', '0', 'no', 'off'):
+            return False
+    raise ValueError(value)
+
+
+def _parse_int(value):
+    """把 JSON 的整數或數字字串轉為 int；布林值與有小數的數字拋出 ValueError (int() 會默默接受)"""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(value)
+    return int(value)
+
+
+# 提交工作時可指定的選項與型別
+JOB_OPTIONS = {
+    'name': str,
+    'limit': _parse_int,
+    'batch_size': _parse_int,
+    'stream': _parse_bool,
+    'columns': str,
+    'shard_size': _parse_int,
+    'sync': str,
+}
+
+
+class JobLog:
+    """工作的輸出 (同時寫到服務本身的輸出)"""
+
+    def __init__(self, echo=None):
+        self.chunks = []
+        self.length = 0
+        self.echo = echo
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        with self._lock:
+            self.chunks.append(text)
+            self.length += len(text)
+        if self.echo is not None:
+            self.echo.write(text)
+        return len(text)
+
+    def flush(self):
+        if self.echo is not None:
+            self.echo.flush()
+
+    def read(self, offset=0):
+        with self._lock:
+            return ''.join(self.chunks)[offset:]
+
+
+class PlaylistService:
+    """接收播放清單工作並依序執行，工作之間共用客戶端與快取
+
+    settings 為 PlaylistPipeline 的設定 (見 playlist_pipeline.pipeline_options)。
+    """
+
+    def __init__(self, settings, youtube=None, chart_cache=None, echo=True):
+        self.settings = dict(settings)
+        self.settings.setdefault('ytdlp', YtDlpSearchEngine(pool_size=self.settings.get('workers', 1)))
+        self.youtube = youtube
+        self.chart_cache = chart_cache
+        self.echo = sys.stdout if echo else None
+        self.jobs = {}
+        self.current = None
+        self._next_id = 1
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._runner = None
+        self._stopping = False
+
+    def connect(self):
+        """授權並建立共用的 YouTube 客戶端 (只在服務啟動時進行一次)"""
+        if self.youtube is None:
+            self.youtube = PlaylistPipeline(**self.settings).youtube
+        return self.youtube
+
+    def start(self):
+        self._runner = threading.Thread(target=self._run_jobs, daemon=True)
+        self._runner.start()
+        return self
+
+    def stop(self):
+        """等待目前的工作結束後停止 (佇列中的工作取消)，並關閉共用的資源"""
+        self._stopping = True
+        self._queue.put(None)
+        if self._runner is not None:
+            self._runner.join()
+        self.settings['ytdlp'].close()
+        if self.settings.get('cache') is not None:
+            self.settings['cache'].close()
+        if self.settings.get('catalog') is not None:
+            self.settings['catalog'].close()
+
+    def submit(self, request):
+        """加入工作，回傳工作資料；參數錯誤時拋出 ValueError"""
+        if not isinstance(request, dict):
+            raise ValueError("工作內容必須是 JSON 物件")
+        source = request.get('source')
+        if source not in SOURCES:
+            raise ValueError(f"source 必須是 {' 或 '.join(SOURCES)}")
+        if source == 'txt':
+            target = request.get('path')
+            if not target or not os.path.isfile(target):
+                raise ValueError(f"找不到 txt 文件: {target}")
+        else:
+            target = resolve_chart_url(request.get('chart') or 'realtime')
+        options = {}
+        for key, kind in JOB_OPTIONS.items():
+            if request.get(key) is not None:
+                try:
+                    options[key] = kind(request[key])
+                except (TypeError, ValueError):
+                    raise ValueError(f"{key} 的值不正確: {request[key]}")
+        if options.get('columns', 'auto') not in COLUMN_ORDERS:
+            raise ValueError(f"columns 必須是 {', '.join(COLUMN_ORDERS)}")
+
+        with self._lock:
+            job = {
+                'id': self._next_id, 'source': source, 'target': target, 'options': options,
+                'status': 'queued', 'submitted_at': time.time(), 'started_at': None,
+                'finished_at': None, 'playlist_id': None, 'error': None,
+                'log': JobLog(self.echo),
+            }
+            self.jobs[job['id']] = job
+            self._next_id += 1
+        self._queue.put(job)
+        return job
+
+    def status(self):
+        quota = self.settings.get('quota')
+        pool = self.settings.get('search_pool')
+        with self._lock:
+            queued = sum(1 for job in self.jobs.values() if job['status'] == 'queued')
+        return {
+            'running': self.current, 'queued': queued, 'jobs': len(self.jobs),
+            'quota_used': quota.used if quota is not None else None,
+            'quota_remaining': quota.remaining if quota is not None else None,
+            'pool_searches': pool.affordable('search') if pool is not None else None,
+        }
+
+    def _run_jobs(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            if self._stopping:
+                job['status'] = 'cancelled'
+                continue
+            self.current = job['id']
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            try:
+                # 一次只執行一個工作，執行期間的輸出都屬於這個工作
+                with contextlib.redirect_stdout(job['log']):
+                    job['playlist_id'] = self._run(job)
+                job['status'] = 'done'
+            except Exception as e:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                job['finished_at'] = time.time()
+                self.current = None
+
+    def _run(self, job):
+        options = job['options']
+        common = dict(playlist_name=options.get('name'), batch_size=options.get('batch_size', 0),
+                      sync_playlist_id=options.get('sync'))
+        if job['source'] == 'melon':
+            converter = MelonToYouTubePlaylist(chart_url=job['target'], chart_cache=self.chart_cache,
+                                               youtube=self.youtube, **self.settings)
+            return converter.create_playlist_from_melon(limit=options.get('limit', 100), **common)
+        converter = TxtToYouTubePlaylist(youtube=self.youtube, **self.settings)
+        return converter.create_playlist_from_txt(
+            job['target'], limit=options.get('limit'), stream=options.get('stream', False),
+            columns=options.get('columns', 'auto'), shard_size=options.get('shard_size', 0),
+            **common)
+
+    def serve(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """建立 HTTP 伺服器 (呼叫端負責 serve_forever)"""
+        return ThreadingHTTPServer((host, port), self._make_handler())
+
+    def _make_handler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                parts = url.path.strip('/').split('/')
+                if url.path == '/status':
+                    return self._send_json(200, service.status())
+                if url.path == '/metrics':
+                    return self._send(200, metrics.prometheus_text().encode('utf-8'),
+                                      'text/plain; version=0.0.4; charset=utf-8')
+                if url.path == '/jobs':
+                    with service._lock:
+                        jobs = [_summary(job) for job in service.jobs.values()]
+                    return self._send_json(200, jobs)
+                if len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+                    job = service.jobs.get(int(parts[1]))
+                    if job is None:
+                        return self._send_json(404, {'error': '找不到工作'})
+                    offset = parse_qs(url.query).get('offset', ['0'])[0]
+                    try:
+                        offset = int(offset)
+                    except ValueError:
+                        offset = -1
+                    if offset < 0:
+                        return self._send_json(400, {'error': 'offset 必須是非負整數'})
+                    result = _summary(job)
+                    result['log'] = job['log'].read(offset)
+                    result['log_offset'] = job['log'].length
+                    return self._send_json(200, result)
+                self._send_json(404, {'error': '找不到路徑'})
+
+            def do_POST(self):
+                if urlsplit(self.path).path != '/jobs':
+                    return self._send_json(404, {'error': '找不到路徑'})
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    job = service.submit(json.loads(self.rfile.read(length) or b'{}'))
+                except ValueError as e:
+                    return self._send_json(400, {'error': str(e)})
+                self._send_json(201, _summary(job))
+
+            def _send_json(self, status, data):
+                self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                           'application/json; charset=utf-8')
+
+            def _send(self, status, content, content_type):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def _summary(job):
+    return {key: value for key, value in job.items() if key != 'log'}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='常駐的播放清單服務 (以 playlist_client.py 提交工作)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='監聽位址 (預設: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='監聽埠號 (預設: %d)' % DEFAULT_PORT)
+    parser.add_argument(
+        '--chart-cache-dir',
+        type=str,
+        default='.chart_cache',
+        help='排行榜頁面快取目錄 (預設: .chart_cache)'
+    )
+    add_settings_arguments(parser, token_file="token.json")
+    args = parser.parse_args()
+
+    service = PlaylistService(pipeline_options(args), chart_cache=ChartCache(args.chart_cache_dir))
+    try:
+        print("正在授權並建立 YouTube 客戶端...")
+        service.connect()
+        server = service.serve(args.host, args.port)
+    except Exception as e:
+        print(f"服務啟動失敗: {e}")
+        service.stop()
+        return
+    service.start()
+    print(f"播放清單服務已啟動: http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n正在停止服務 (等待目前的工作結束)...")
+    finally:
+        server.server_close()
+        service.stop()
+        if args.metrics_file:
+            metrics.print_summary()
+            metrics.export(args.metrics_file, args.metrics_format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+from datetime import datetime
+
+# YouTube 每個播放清單最多可放的影片數量
+MAX_PLAYLIST_ITEMS = 5000
+
+
+def shard_title(name, part):
+    """分割後第 part 個播放清單的名稱"""
+    return f"{name} - part {part}"
+
+
+def iter_shards(resolved, shard_size, start_part=1, skip_through=0, on_missing=None):
+    """將 (num, track, video_id) 依序分組，每組最多 shard_size 首找到影片的歌曲
+
+    產生 (part, [(num, track, video_id), ...])。num <= skip_through 的歌曲
+    (已完成的播放清單) 直接略過；找不到影片的歌曲不佔名額，會交給 on_missing。
+    """
+    part = start_part
+    items = []
+    for num, track, video_id in resolved:
+        if num <= skip_through:
+            continue
+        if not video_id:
+            if on_missing is not None:
+                on_missing(num, track)
+            continue
+        items.append((num, track, video_id))
+        if len(items) >= shard_size:
+            yield part, items
+            part += 1
+            items = []
+    if items:
+        yield part, items
+
+
+class ShardIndex:
+    """分割後播放清單的索引檔 (JSON)
+
+    每個播放清單記錄名稱、ID、涵蓋的歌曲編號與已處理的數量，
+    每次更新都立即寫回檔案，因此也用來繼續中斷的工作 (--resume)。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """讀取既有的索引檔，成功時回傳 True"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"播放清單索引讀取失敗: {e}")
+            return False
+        return 'playlists' in self.data
+
+    def start(self, name, source, shard_size):
+        """開始新的分割工作 (覆蓋舊的索引)"""
+        with self._lock:
+            self.data = {
+                'name': name,
+                'source': source,
+                'shard_size': shard_size,
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'playlists': [],
+            }
+            self._save()
+
+    @property
+    def playlists(self):
+        return self.data.get('playlists', [])
+
+    def get(self, part):
+        for entry in self.playlists:
+            if entry['part'] == part:
+                return entry
+        return None
+
+    def update(self, part, **fields):
+        """更新第 part 個播放清單的記錄並寫回檔案"""
+        with self._lock:
+            entry = self.get(part)
+            if entry is None:
+                entry = {'part': part}
+                self.data['playlists'].append(entry)
+                self.data['playlists'].sort(key=lambda e: e['part'])
+            entry.update(fields)
+            self._save()
+            return dict(entry)
+
+    def completed_prefix(self):
+        """從第 1 個開始連續已完成的播放清單，回傳 (數量, 最後一首的編號)"""
+        count = 0
+        last_num = 0
+        for entry in self.playlists:
+            if entry['part'] != count + 1 or entry.get('processed', 0) < entry.get('total', 1):
+                break
+            count += 1
+            last_num = entry['last_num']
+        return count, last_num
+
+    def _save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,150 @@
+import bisect
+
+from googleapiclient.errors import HttpError
+
+from quota import QUOTA_COSTS
+
+ACTION_NAMES = {'delete': '刪除', 'move': '移動', 'insert': '新增'}
+# 同步操作對應的配額種類 (移動是 playlistItems().update)
+ACTION_QUOTA = {'delete': 'delete', 'move': 'update', 'insert': 'insert'}
+
+
+def list_playlist_items(youtube, playlist_id, retry, limiter=None, quota=None):
+    """分頁取得播放清單現有項目，回傳 [(item_id, video_id), ...] (依播放清單順序)"""
+    items = []
+    page_token = None
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        if quota is not None:
+            quota.charge('list')
+        request = youtube.playlistItems().list(
+            part="snippet",
+            playlistId=playlist_id,
+            maxResults=50,
+            pageToken=page_token
+        )
+        response = retry.execute(request)
+        for item in response.get('items', []):
+            items.append((item['id'], item['snippet']['resourceId']['videoId']))
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return items
+
+
+def plan_playlist_sync(current, target):
+    """計算把播放清單從 current 變成 target 所需的最少操作
+
+    current 為 [(item_id, video_id), ...]，target 為 video_id 列表。
+    回傳依序執行的操作列表：
+    ('delete', item_id, video_id, None) / ('move', item_id, video_id, position) /
+    ('insert', None, video_id, position)
+
+    保留下來的項目中，位置順序已經正確的最長子序列 (LIS) 不會被移動，
+    其他項目與新歌曲依序放在目標順序中前一首歌的後面。
+    """
+    target = list(dict.fromkeys(target))
+    target_index = {video_id: i for i, video_id in enumerate(target)}
+
+    # 已存在的歌曲保留第一個，其他 (不在目標中或重複) 刪除
+    ops = []
+    kept = []
+    kept_ids = {}
+    for item_id, video_id in current:
+        if video_id in target_index and video_id not in kept_ids:
+            kept.append(video_id)
+            kept_ids[video_id] = item_id
+        else:
+            ops.append(('delete', item_id, video_id, None))
+
+    stable = set(_longest_increasing_subsequence(kept, target_index))
+
+    simulated = list(kept)
+    for i, video_id in enumerate(target):
+        if video_id in stable:
+            continue
+        if video_id in kept_ids:
+            simulated.remove(video_id)
+        position = simulated.index(target[i - 1]) + 1 if i > 0 else 0
+        simulated.insert(position, video_id)
+        if video_id in kept_ids:
+            ops.append(('move', kept_ids[video_id], video_id, position))
+        else:
+            ops.append(('insert', None, video_id, position))
+    return ops
+
+
+def _longest_increasing_subsequence(videos, target_index):
+    """回傳 videos 中依 target_index 遞增的最長子序列 (O(n log n))"""
+    tails = []
+    tail_positions = []
+    previous = [None] * len(videos)
+    for pos, video_id in enumerate(videos):
+        value = target_index[video_id]
+        i = bisect.bisect_left(tails, value)
+        if i == len(tails):
+            tails.append(value)
+            tail_positions.append(pos)
+        else:
+            tails[i] = value
+            tail_positions[i] = pos
+        previous[pos] = tail_positions[i - 1] if i > 0 else None
+
+    result = []
+    pos = tail_positions[-1] if tail_positions else None
+    while pos is not None:
+        result.append(videos[pos])
+        pos = previous[pos]
+    return result[::-1]
+
+
+def sync_cost(ops):
+    """執行所有同步操作需要的配額單位"""
+    return sum(QUOTA_COSTS[ACTION_QUOTA[op[0]]] for op in ops)
+
+
+def apply_playlist_sync(youtube, playlist_id, ops, retry, limiter=None, quota=None):
+    """依序執行同步操作，回傳 (成功數, 失敗數)
+
+    刪除會先執行，中途配額不足會留下被清空一半的播放清單，所以開始前先確認
+    剩餘配額足夠執行所有操作；不足時不做任何修改並回傳 None。
+    """
+    if quota is not None:
+        cost = sync_cost(ops)
+        if cost > quota.remaining:
+            print(f"剩餘配額不足: 同步需要 {cost} 單位，剩餘 {quota.remaining} 單位，"
+                  f"未修改播放清單 (請之後再試)")
+            return None
+    done = 0
+    failed = 0
+    for action, item_id, video_id, position in ops:
+        if quota is not None:
+            quota.charge(ACTION_QUOTA[action])
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            if action == 'delete':
+                retry.execute(youtube.playlistItems().delete(id=item_id))
+            else:
+                snippet = {
+                    'playlistId': playlist_id,
+                    'position': position,
+                    'resourceId': {
+                        'kind': 'youtube#video',
+                        'videoId': video_id
+                    }
+                }
+                if action == 'move':
+                    request = youtube.playlistItems().update(
+                        part="snippet", body={'id': item_id, 'snippet': snippet})
+                else:
+                    request = youtube.playlistItems().insert(
+                        part="snippet", body={'snippet': snippet})
+                retry.execute(request)
+            done += 1
+            print(f"   ✓ {ACTION_NAMES[action]}: {video_id}"
+                  + (f" (位置 {position + 1})" if position is not None else ""))
+        except HttpError as err:
+            failed += 1
+            print(f"   ✗ {ACTION_NAMES[action]}失敗: {video_id} - {err}")
+    return done, failed
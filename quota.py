@@ -0,0 +1,135 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        # YouTube Data API 配額在太平洋時間午夜重置
+        QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+    except ZoneInfoNotFoundError:
+        QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+except ImportError:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# 各種 API 請求消耗的配額單位
+QUOTA_COSTS = {
+    'search': 100,      # search().list
+    'playlist': 50,     # playlists().insert
+    'insert': 50,       # playlistItems().insert
+    'update': 50,       # playlistItems().update
+    'delete': 50,       # playlistItems().delete
+    'list': 1,          # playlistItems().list
+    'videos': 1,        # videos().list (取得影片長度)
+}
+DAILY_QUOTA = 10000
+
+
+def quota_today():
+    return datetime.now(QUOTA_TIMEZONE).strftime("%Y-%m-%d")
+
+
+class QuotaMeter:
+    """計算 YouTube Data API 配額用量，並以日期保存每日總計
+
+    - path: 用量記錄檔 (JSON)，None 時只在記憶體中計算
+    - daily_limit: 每日配額上限
+    """
+
+    def __init__(self, path="quota_usage.json", daily_limit=DAILY_QUOTA):
+        self.path = path
+        self.daily_limit = daily_limit
+        self.session = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._usage = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"配額記錄檔讀取失敗，將重新記錄: {e}")
+
+    @property
+    def used(self):
+        """今天已使用的配額 (包含之前執行的用量)"""
+        return self._usage.get(quota_today(), {}).get('total', 0)
+
+    @property
+    def remaining(self):
+        return max(0, self.daily_limit - self.used)
+
+    def can_afford(self, operation, count=1, reserve=0):
+        """剩餘配額是否足夠執行 count 次 operation，並保留 reserve 單位"""
+        return QUOTA_COSTS[operation] * count + reserve <= self.remaining
+
+    def affordable(self, operation):
+        """剩餘配額最多可執行幾次 operation"""
+        return self.remaining // QUOTA_COSTS[operation]
+
+    def charge(self, operation, count=1):
+        """記錄 count 次 operation 的用量"""
+        cost = QUOTA_COSTS[operation] * count
+        with self._lock:
+            day = self._usage.setdefault(quota_today(), {})
+            day['total'] = day.get('total', 0) + cost
+            day[operation] = day.get(operation, 0) + count
+            self.session[operation] = self.session.get(operation, 0) + count
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        # 只保留最近 30 天的記錄
+        for day in sorted(self._usage)[:-30]:
+            del self._usage[day]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._usage, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def print_stats(self):
+        cost = sum(QUOTA_COSTS[op] * count for op, count in self.session.items())
+        print(f"API 配額: 本次使用 {cost} 單位，今日共 {self.used}/{self.daily_limit}"
+              f" (剩餘 {self.remaining})")
+
+
+def print_plan(meter, track_count, cache_hits, cache_not_found, create_playlist=True,
+               fallback=None, pool_searches=0):
+    """列出工作的配額估算，並說明今天的剩餘配額是否足夠
+
+    pool_searches 為配額池 (其他專案的設定檔) 今天還可執行的搜索次數，優先使用。
+    """
+    searches = track_count - cache_hits - cache_not_found
+    pooled = min(searches, pool_searches)
+    searches -= pooled
+    inserts = track_count - cache_not_found
+    rows = [('search', searches, searches * QUOTA_COSTS['search']),
+            ('insert', inserts, inserts * QUOTA_COSTS['insert'])]
+    if create_playlist:
+        rows.append(('playlist', 1, QUOTA_COSTS['playlist']))
+    total = sum(cost for _, _, cost in rows)
+    names = {'search': '搜索', 'insert': '添加歌曲', 'playlist': '創建播放清單'}
+
+    print('=' * 50)
+    print(f"配額估算 ({track_count} 首歌曲，快取命中 {cache_hits}，快取確認找不到 {cache_not_found})")
+    if pooled:
+        print(f"  配額池搜索: {pooled} 次 (使用其他設定檔的配額，還可搜索 {pool_searches} 次)")
+    for operation, count, cost in rows:
+        print(f"  {names[operation]}: {count} 次 x {QUOTA_COSTS[operation]} = {cost} 單位")
+    print(f"  合計: {total} 單位")
+    print(f"今日已使用 {meter.used}/{meter.daily_limit}，剩餘 {meter.remaining}")
+    if total <= meter.remaining:
+        print("✓ 剩餘配額足夠完成這個工作")
+    else:
+        insert_cost = inserts * QUOTA_COSTS['insert'] + (QUOTA_COSTS['playlist'] if create_playlist else 0)
+        if fallback and insert_cost <= meter.remaining:
+            print(f"✗ 配額不足 {total - meter.remaining} 單位；{fallback}")
+        else:
+            # 搜索都由配額池負擔時，只有添加歌曲使用這個帳號的配額
+            per_track = QUOTA_COSTS['insert'] + (QUOTA_COSTS['search'] if searches else 0)
+            print(f"✗ 配額不足 {total - meter.remaining} 單位，今天大約只能完成"
+                  f" {max(0, meter.remaining - QUOTA_COSTS['playlist']) // per_track} 首"
+                  f" (可用 --resume 明天繼續)")
+    print('=' * 50)
+    return total
@@ -0,0 +1,164 @@
+"""多組 OAuth 憑證的搜索配額池
+
+YouTube Data API 的配額以 Google Cloud 專案計算，每個專案每天 10000 單位 (約 100 次搜索)。
+設定檔 (profile) 是一組屬於其他專案的 OAuth 憑證，各自有配額記錄；搜索分散到這些設定檔，
+創建播放清單與添加歌曲仍使用播放清單擁有者的帳號 (--token-file)。
+
+設定檔清單 (JSON，相對路徑以清單所在目錄為準):
+{
+  "profiles": [
+    {"name": "project-a", "client_secrets_file": "secrets/a.json"},
+    {"name": "project-b", "client_secrets_file": "secrets/b.json", "token_file": "tokens/b.json",
+     "quota_file": "quota_usage.b.json", "daily_quota": 10000}
+  ]
+}
+token_file 預設為 token.<name>.json，quota_file 預設為 quota_usage.<name>.json。
+
+用法: python quota_pool.py profiles.json           # 列出各設定檔今日的配額
+      python quota_pool.py profiles.json --login   # 事先授權所有設定檔
+"""
+import argparse
+import json
+import os
+import threading
+
+from quota import QuotaMeter, DAILY_QUOTA, quota_today
+from youtube_auth import load_credentials, build_youtube_client
+
+
+class SearchProfile:
+    """一組 OAuth 憑證與它的配額記錄，YouTube 客戶端在第一次搜索時才建立"""
+
+    def __init__(self, name, client_secrets_file=None, token_file=None, quota=None, youtube=None):
+        self.name = name
+        self.client_secrets_file = client_secrets_file
+        self.token_file = token_file
+        self.quota = quota if quota is not None else QuotaMeter(None)
+        self.exhausted_on = None
+        self._youtube = youtube
+        self._lock = threading.Lock()
+
+    @property
+    def youtube(self):
+        with self._lock:
+            if self._youtube is None:
+                credentials = load_credentials(self.client_secrets_file, self.token_file)
+                self._youtube = build_youtube_client(credentials)
+        return self._youtube
+
+    @property
+    def exhausted(self):
+        """今天已停用 (配額用完或授權失敗)，配額重置後自動恢復"""
+        return self.exhausted_on == quota_today()
+
+
+class QuotaPool:
+    """在多個設定檔之間分配搜索
+
+    每次選擇剩餘配額最多的設定檔，讓用量平均分散；設定檔的配額用完 (或 API 回傳
+    quotaExceeded) 時停用到配額重置，之後的搜索輪換到其他設定檔。
+    """
+
+    def __init__(self, profiles):
+        self.profiles = list(profiles)
+        self._lock = threading.Lock()
+
+    def acquire(self, operation='search'):
+        """選出可負擔 operation 的設定檔並記錄用量，全部用完時回傳 None
+
+        選擇與記錄在同一個鎖中進行，並行搜索時不會超過各設定檔的配額。
+        """
+        with self._lock:
+            usable = []
+            for profile in self.profiles:
+                if profile.exhausted:
+                    continue
+                if profile.quota.can_afford(operation):
+                    usable.append(profile)
+                else:
+                    self._disable(profile, f"今日配額已用完 ({profile.quota.used}/{profile.quota.daily_limit})")
+            if not usable:
+                return None
+            profile = max(usable, key=lambda profile: profile.quota.remaining)
+            profile.quota.charge(operation)
+            return profile
+
+    def disable(self, profile, reason):
+        """今天不再使用 profile (例如 API 回傳配額用完，或授權失敗)"""
+        with self._lock:
+            if not profile.exhausted:
+                self._disable(profile, reason)
+
+    def _disable(self, profile, reason):
+        profile.exhausted_on = quota_today()
+        others = sum(1 for other in self.profiles if not other.exhausted)
+        if others:
+            print(f"   設定檔 {profile.name} {reason}，改用其他 {others} 個設定檔搜索")
+        else:
+            print(f"   設定檔 {profile.name} {reason}，所有設定檔都已用完")
+
+    def affordable(self, operation='search'):
+        """所有可用的設定檔合計還可執行幾次 operation"""
+        return sum(profile.quota.affordable(operation)
+                   for profile in self.profiles if not profile.exhausted)
+
+    def print_stats(self):
+        print(f"搜索配額池: {len(self.profiles)} 個設定檔，今日還可搜索 {self.affordable('search')} 次")
+        for profile in self.profiles:
+            meter = profile.quota
+            state = " (已停用)" if profile.exhausted else ""
+            print(f"  {profile.name}: 本次搜索 {meter.session.get('search', 0)} 次，"
+                  f"今日共 {meter.used}/{meter.daily_limit}{state}")
+
+
+def load_profiles(path):
+    """讀取設定檔清單，格式錯誤時拋出 ValueError"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('profiles') if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"{path} 中沒有設定檔 (需要 \"profiles\" 列表)")
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    profiles = []
+    for entry in entries:
+        name = entry.get('name') if isinstance(entry, dict) else None
+        if not name:
+            raise ValueError(f"{path} 中的設定檔缺少 name: {entry}")
+        if any(profile.name == name for profile in profiles):
+            raise ValueError(f"{path} 中的設定檔名稱重複: {name}")
+        resolve = lambda key, default: os.path.join(base_dir, entry.get(key) or default)
+        profiles.append(SearchProfile(
+            name,
+            client_secrets_file=resolve('client_secrets_file', f"client_secret.{name}.json"),
+            token_file=resolve('token_file', f"token.{name}.json"),
+            quota=QuotaMeter(resolve('quota_file', f"quota_usage.{name}.json"),
+                             int(entry.get('daily_quota', DAILY_QUOTA)))))
+    return profiles
+
+
+def main():
+    parser = argparse.ArgumentParser(description='列出搜索配額池中各設定檔的配額，或事先授權')
+    parser.add_argument('profiles', help='設定檔清單 (JSON)')
+    parser.add_argument('--login', action='store_true',
+                        help='依序授權每個設定檔並保存憑證，之後搜索時不需再開啟瀏覽器')
+    args = parser.parse_args()
+
+    try:
+        pool = QuotaPool(load_profiles(args.profiles))
+    except (OSError, ValueError) as e:
+        print(f"設定檔清單讀取失敗: {e}")
+        return
+    if args.login:
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+        for profile in pool.profiles:
+            print(f"正在授權設定檔 {profile.name}...")
+            try:
+                load_credentials(profile.client_secrets_file, profile.token_file)
+            except Exception as e:
+                print(f"  授權失敗: {e}")
+    pool.print_stats()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import difflib
+import html
+import re
+import unicodedata
+
+# 標題含有這些字時加分 (官方 MV / 音源)
+POSITIVE_KEYWORDS = ['official', 'mv', 'm/v', 'music video', 'audio', '뮤직비디오']
+# 標題含有這些字時扣分 (翻唱、反應、直拍等)，歌名本身包含時不扣分
+NEGATIVE_KEYWORDS = ['cover', 'reaction', 'fancam', 'fan cam', '직캠', 'dance practice',
+                     'karaoke', 'lyrics', 'live', 'remix', 'sped up', 'slowed', 'nightcore',
+                     'teaser', 'behind', 'instrumental', 'inst.', 'mr removed', '1 hour',
+                     'shorts', 'tutorial', 'piano', 'guitar']
+# 常見的韓國音樂官方頻道
+OFFICIAL_CHANNELS = ['1thek', 'hybe labels', 'smtown', 'jyp entertainment', 'stone music entertainment',
+                     'yg entertainment', 'starshiptv', 'kakao entertainment', 'genie music', 'mnet k-pop',
+                     'the black label', 'cube entertainment', 'woollim', 'fnc entertainment']
+
+
+def _keyword_pattern(keyword):
+    """英文關鍵字只比對完整的字 ('live' 不符合 "Alive"、'cover' 不符合 "Discover")，韓文直接比對"""
+    if keyword.isascii():
+        return re.compile(r"(?<![a-z0-9])" + re.escape(keyword) + r"(?![a-z0-9])")
+    return re.compile(re.escape(keyword))
+
+
+_NEGATIVE_PATTERNS = [_keyword_pattern(keyword) for keyword in NEGATIVE_KEYWORDS]
+_PUNCTUATION = re.compile(r"[^\w\s]+", re.UNICODE)
+_ISO_DURATION = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?")
+
+
+def normalize_text(text):
+    """小寫、全半形統一並移除標點，用於比對"""
+    text = unicodedata.normalize('NFKC', html.unescape(text or '')).lower()
+    return ' '.join(_PUNCTUATION.sub(' ', text).split())
+
+
+def parse_iso_duration(value):
+    """將 API 的 ISO 8601 長度 (例如 PT3M25S) 轉換為秒數"""
+    match = _ISO_DURATION.fullmatch(value or '')
+    if not match:
+        return None
+    hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def candidates_from_search_response(response):
+    """將 search().list 的回應轉換為候選列表"""
+    candidates = []
+    for item in response.get('items', []):
+        video_id = item.get('id', {}).get('videoId')
+        if video_id:
+            snippet = item.get('snippet', {})
+            candidates.append({
+                'id': video_id,
+                'title': html.unescape(snippet.get('title', '')),
+                'channel': html.unescape(snippet.get('channelTitle', '')),
+                'duration': None,
+            })
+    return candidates
+
+
+def _similarity(needle, haystack):
+    """needle 在 haystack 中的相似度 (0~1)：字詞覆蓋率與最佳子字串比對取較大值"""
+    if not needle or not haystack:
+        return 0.0
+    if needle in haystack:
+        return 1.0
+    needle_tokens = set(needle.split())
+    coverage = len(needle_tokens & set(haystack.split())) / len(needle_tokens)
+    matcher = difflib.SequenceMatcher(None, needle, haystack, autojunk=False)
+    # 只計算長度 3 以上的相同片段，避免短字串因零散相同字元得到高分
+    blocks = sum(block.size for block in matcher.get_matching_blocks() if block.size >= 3)
+    return max(coverage, blocks / len(needle))
+
+
+def score_candidates(track, candidates, min_duration=None, max_duration=None):
+    """為每個候選影片評分，回傳 [(分數 0~1, 候選), ...] (依分數由高到低)"""
+    name = normalize_text(track['name'])
+    # "YUNA (ITZY)" 之類的歌手同時比對括號前後的名稱
+    artists = [normalize_text(part) for part in re.split(r"[/,&()]", track['artist']) if part.strip()]
+    # 歌名本身包含的關鍵字 (例如歌名就是 "Live") 不扣分
+    raw_name = (track['name'] or '').lower()
+    negative = [pattern for pattern in _NEGATIVE_PATTERNS if not pattern.search(raw_name)]
+    results = []
+
+    for rank, candidate in enumerate(candidates):
+        title = normalize_text(candidate.get('title'))
+        channel = normalize_text(candidate.get('channel'))
+        raw_title = (candidate.get('title') or '').lower()
+
+        name_score = _similarity(name, title)
+        artist_score = max([max(_similarity(artist, title), _similarity(artist, channel))
+                            for artist in artists] or [0.0])
+        score = 0.55 * name_score + 0.3 * artist_score
+
+        if channel.endswith(' topic') or any(channel == artist for artist in artists):
+            score += 0.15
+        elif ('official' in channel or 'vevo' in channel
+              or any(official in channel for official in OFFICIAL_CHANNELS)):
+            score += 0.1
+        if any(keyword in raw_title for keyword in POSITIVE_KEYWORDS):
+            score += 0.05
+        if any(pattern.search(raw_title) for pattern in negative):
+            score -= 0.25
+
+        duration = candidate.get('duration')
+        if duration is not None:
+            if (min_duration and duration < min_duration) or (max_duration and duration > max_duration):
+                score -= 0.5
+            elif duration > 600:
+                score -= 0.1
+
+        # 同分時保留搜尋結果原本的順序
+        score -= rank * 0.001
+        results.append((max(0.0, min(1.0, score)), candidate))
+
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results
+
+
+def pick_best(track, candidates, min_duration=None, max_duration=None):
+    """回傳 (最佳候選, 信心分數)，沒有候選時回傳 (None, 0.0)"""
+    if not candidates:
+        return None, 0.0
+    if len(candidates) == 1 and not (min_duration or max_duration):
+        # 只有一個候選時仍計算信心分數，但一定選它 (與原本 maxResults=1 相同)
+        return candidates[0], score_candidates(track, candidates)[0][0]
+    return score_candidates(track, candidates, min_duration, max_duration)[0][::-1]
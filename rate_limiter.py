@@ -0,0 +1,35 @@
+import threading
+import time
+
+from metrics import metrics
+
+
+class RateLimiter:
+    """令牌桶限速器 (執行緒安全)
+
+    - rate: 每秒允許的請求數，None 或 0 代表不限速
+    - burst: 令牌桶容量，即可連續送出的請求數
+    """
+
+    def __init__(self, rate=2.0, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """取得令牌，必要時等待"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            metrics.observe('phase_seconds', wait, phase='sleep', reason='rate_limit')
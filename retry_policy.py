@@ -0,0 +1,129 @@
+import random
+import socket
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+
+from metrics import metrics
+
+# 暫時性錯誤，稍後重試通常會成功
+TRANSIENT_STATUS = [429, 500, 502, 503, 504]
+# 每日配額用完，重試只會浪費時間
+QUOTA_REASONS = ['quotaExceeded', 'dailyLimitExceeded']
+# 短時間內請求過多，等待後可重試
+RATE_LIMIT_REASONS = ['rateLimitExceeded', 'userRateLimitExceeded']
+
+
+class QuotaExceededError(HttpError):
+    """YouTube Data API 每日配額已用完"""
+
+    def __init__(self, err):
+        super().__init__(err.resp, err.content, uri=err.uri)
+
+
+def get_error_reason(err):
+    """取得 HttpError 的錯誤原因 (例如 quotaExceeded)"""
+    details = getattr(err, 'error_details', None)
+    if isinstance(details, list):
+        for detail in details:
+            if isinstance(detail, dict) and detail.get('reason'):
+                return detail['reason']
+    return ''
+
+
+def classify_error(err):
+    """將錯誤分類為 quota / rate_limit / transient / duplicate / fatal"""
+    if not isinstance(err, HttpError):
+        return 'transient'
+    status = err.resp.status
+    reason = get_error_reason(err)
+    text = str(err).lower()
+    if status in [403, 429] and (reason in QUOTA_REASONS or 'quota' in text):
+        return 'quota'
+    if status == 409:
+        return 'duplicate'
+    if reason in RATE_LIMIT_REASONS or status == 429:
+        return 'rate_limit'
+    if status in TRANSIENT_STATUS:
+        return 'transient'
+    return 'fatal'
+
+
+def get_retry_after(err):
+    """解析 Retry-After 標頭 (秒數或 HTTP 日期)，沒有時回傳 None"""
+    resp = getattr(err, 'resp', None)
+    value = resp.get('retry-after') if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    import email.utils
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class RetryPolicy:
+    """API 請求的重試策略：指數退避 + 隨機抖動
+
+    - max_retries: 單一請求最多重試次數
+    - base_delay / max_delay: 退避等待時間的起始值與上限 (秒)
+    - total_budget: 整個執行過程中花在重試等待的總時間上限 (秒)
+    """
+
+    def __init__(self, max_retries=5, base_delay=1.0, max_delay=32.0, total_budget=300.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+        self.waited = 0.0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def execute(self, request):
+        """執行 API 請求，暫時性錯誤會自動重試
+
+        配額用完時拋出 QuotaExceededError；409 與其他無法重試的錯誤
+        直接拋出原本的 HttpError 由呼叫端處理。
+        """
+        # 送出請求時 googleapiclient.http 已載入 httplib2，這裡只是取得模組
+        import httplib2
+
+        attempt = 0
+        while True:
+            try:
+                return request.execute()
+            except (HttpError, socket.timeout, ConnectionError, httplib2.HttpLib2Error) as err:
+                metrics.http_error('api', err)
+                kind = classify_error(err)
+                if kind == 'quota':
+                    raise QuotaExceededError(err) from err
+                if kind in ['duplicate', 'fatal']:
+                    raise
+                if attempt >= self.max_retries or not self.backoff(attempt, err):
+                    raise
+                attempt += 1
+
+    def backoff(self, attempt, err=None):
+        """依重試次數等待，超過總時間預算時回傳 False 而不等待"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = get_retry_after(err) if err is not None else None
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        with self._lock:
+            if self.waited + delay > self.total_budget:
+                print(f"   重試等待時間已超過上限 ({self.total_budget:g} 秒)，放棄重試")
+                return False
+            self.waited += delay
+            self.retries += 1
+
+        print(f"   {delay:.1f} 秒後重試 (第 {attempt + 1} 次)...")
+        time.sleep(delay)
+        metrics.observe('phase_seconds', delay, phase='sleep', reason='retry')
+        return True
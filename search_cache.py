@@ -0,0 +1,147 @@
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from metrics import metrics
+
+
+def normalize_query(query):
+    """將搜尋字串正規化為快取鍵 (全半形統一、小寫、合併空白)"""
+    text = unicodedata.normalize('NFKC', query)
+    return ' '.join(text.lower().split())
+
+
+class SearchCache:
+    """以 SQLite 儲存「歌名 + 歌手」搜尋結果的快取
+
+    - ttl: 找到影片的結果保存秒數
+    - negative_ttl: 「未找到」結果保存秒數
+    - max_entries: 快取上限，超過時淘汰最久未使用的項目 (LRU)
+    """
+
+    def __init__(self, db_path="search_cache.db", ttl=7 * 24 * 3600,
+                 negative_ttl=24 * 3600, max_entries=10000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " query TEXT PRIMARY KEY,"
+            " video_id TEXT,"
+            " title TEXT,"
+            " confidence REAL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(search_cache)")]
+        if 'confidence' not in columns:
+            # 舊版快取檔案沒有信心分數欄位
+            self._conn.execute("ALTER TABLE search_cache ADD COLUMN confidence REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_accessed"
+            " ON search_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, query):
+        """查詢快取
+
+        未命中回傳 None；命中回傳 (video_id, title, confidence)，
+        負快取 (之前確認找不到) 的 video_id 為 None。
+        """
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, title, confidence, created_at FROM search_cache WHERE query = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                metrics.cache_result('search', False)
+                return None
+
+            video_id, title, confidence, created_at = row
+            ttl = self.ttl if video_id else self.negative_ttl
+            if ttl is not None and now - created_at > ttl:
+                self._conn.execute("DELETE FROM search_cache WHERE query = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                metrics.cache_result('search', False)
+                return None
+
+            self._conn.execute(
+                "UPDATE search_cache SET accessed_at = ? WHERE query = ?",
+                (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            metrics.cache_result('search', True)
+            return video_id, title, confidence
+
+    def peek(self, query):
+        """與 get 相同，但不更新使用時間與命中統計 (用於估算)"""
+        key = normalize_query(query)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, title, confidence, created_at FROM search_cache WHERE query = ?",
+                (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        video_id, title, confidence, created_at = row
+        ttl = self.ttl if video_id else self.negative_ttl
+        if ttl is not None and time.time() - created_at > ttl:
+            return None
+        return video_id, title, confidence
+
+    def put(self, query, video_id, title=None, confidence=None):
+        """寫入搜尋結果，video_id 為 None 時記錄為「未找到」"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache"
+                " (query, video_id, title, confidence, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, video_id, title, confidence, now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """超過容量上限時刪除最久未使用的項目"""
+        if not self.max_entries:
+            return
+        count = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM search_cache WHERE query IN ("
+                " SELECT query FROM search_cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,)
+            )
+
+    def stats(self):
+        """回傳命中/未命中統計"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"搜尋快取: 命中 {stats['hits']} / 未命中 {stats['misses']}"
+              f" (命中率 {stats['hit_rate']:.0%})")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
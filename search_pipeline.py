@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def resolve_tracks(search, tracks, workers=1, window=None):
+    """搜索每首歌曲並依原順序產生 (num, track, video_id)
+
+    workers > 1 時搜索在執行緒池中並行進行，同時最多只有 window 首歌曲
+    在處理中 (預設為 workers 的 4 倍)，因此 tracks 可以是任意長度的迭代器。
+    search 需為 search(track, num) 形式並回傳 video_id 或 None。
+    """
+    if workers <= 1:
+        for num, track in enumerate(tracks, 1):
+            yield num, track, search(track, num)
+        return
+
+    window = window or workers * 4
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for num, track in enumerate(tracks, 1):
+                pending.append((num, track, executor.submit(search, track, num)))
+                if len(pending) >= window:
+                    num, track, future = pending.popleft()
+                    yield num, track, future.result()
+            while pending:
+                num, track, future = pending.popleft()
+                yield num, track, future.result()
+        finally:
+            # 提前中止時取消尚未開始的搜索
+            for _, _, future in pending:
+                future.cancel()
+
+
+def thread_local_request_builder(credentials):
+    """建立 requestBuilder，讓每個執行緒使用自己的 httplib2 連線
+
+    httplib2.Http 不是執行緒安全的，並行搜索時必須每個執行緒各用一個。
+    """
+    import google_auth_httplib2
+    import googleapiclient.http
+    import httplib2
+
+    local = threading.local()
+
+    def build_request(http, *args, **kwargs):
+        if not hasattr(local, 'http'):
+            local.http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        return googleapiclient.http.HttpRequest(local.http, *args, **kwargs)
+
+    return build_request
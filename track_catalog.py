@@ -0,0 +1,251 @@
+import argparse
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from metrics import metrics
+
+_HANGUL = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣]")
+_LATIN = re.compile(r"[a-z]")
+# (feat. X) / [ft. X] / - feat. X 之類的客串標記
+_FEATURING = re.compile(r"[\(\[]\s*(?:feat|ft|featuring|with)\b\.?[^\)\]]*[\)\]]"
+                        r"|\s(?:feat|ft|featuring)\.?\s.*$")
+_PARENTHESES = re.compile(r"^(.*?)\s*[\(\[]([^\)\]]+)[\)\]]\s*$")
+# 歌名括號中的版本標記 (不同版本是不同的影片，不能視為原曲)
+_VERSION = re.compile(r"\b(?:ver|version|remix|mix|inst|instrumental|mr|acoustic|live|edit|remaster(?:ed)?"
+                      r"|demo|cover|karaoke|sped\s*up|slowed|a\s*cappella|acapella|english|japanese"
+                      r"|chinese|korean)\b|버전|리믹스|라이브|어쿠스틱")
+_ARTIST_SEPARATORS = re.compile(r"\s*(?:/|,|&|\sx\s|\sand\s)\s*")
+_NOISE = re.compile(r"[^\w]+", re.UNICODE)
+
+
+def _clean(text):
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _NOISE.sub(' ', text).strip()
+
+
+def _script(text):
+    if _HANGUL.search(text):
+        return 'hangul'
+    if _LATIN.search(text):
+        return 'latin'
+    return 'other'
+
+
+def _variants(text):
+    """產生歌手名稱的比對變體
+
+    "아이유 (IU)" 這類括號內為另一種文字 (韓文/羅馬拼音) 的名稱，
+    括號前後兩種寫法都視為同一個名稱；"YUNA (ITZY)" 這類括號內為所屬團體的名稱
+    (相同文字) 只保留括號前的部分。
+    """
+    text = unicodedata.normalize('NFKC', text or '').strip()
+    text = _FEATURING.sub('', text.lower()).strip()
+    match = _PARENTHESES.match(text)
+    if not match:
+        return [_clean(text)]
+    outer, inner = match.group(1), match.group(2)
+    if outer and _script(outer) != _script(inner):
+        return [_clean(outer), _clean(inner)]
+    return [_clean(outer or inner)]
+
+
+def _name_variants(name):
+    """產生歌名的比對變體
+
+    只去掉客串標記；"좋은 날 (Good Day)" 這類括號內為另一種文字的譯名時兩種寫法都可比對，
+    其他括號 (Inst.、Remix、Japanese Ver. 等) 保留在鍵中，不同版本不會對應到原曲的影片。
+    """
+    text = unicodedata.normalize('NFKC', name or '').strip()
+    text = _FEATURING.sub('', text.lower()).strip()
+    match = _PARENTHESES.match(text)
+    if match:
+        outer, inner = match.group(1), match.group(2)
+        if outer and not _VERSION.search(inner) and _script(outer) != _script(inner):
+            return [_clean(outer), _clean(inner)]
+    return [_clean(text)]
+
+
+def _artist_variants(artist):
+    """多位歌手 (A/B、A & B) 依名稱排序後組合，每位歌手都可有多種寫法"""
+    parts = [part for part in _ARTIST_SEPARATORS.split(artist or '') if part.strip()]
+    if not parts:
+        return ['']
+    combos = [[]]
+    for part in parts:
+        combos = [combo + [variant] for combo in combos for variant in _variants(part)]
+        if len(combos) > 16:
+            break
+    return list(dict.fromkeys('/'.join(sorted(combo)) for combo in combos))
+
+
+def track_keys(name, artist):
+    """回傳歌曲的正規化鍵，第一個為標準鍵，其他為別名"""
+    keys = []
+    for name_variant in _name_variants(name):
+        for artist_variant in _artist_variants(artist):
+            keys.append(f"{name_variant}|{artist_variant}")
+    return list(dict.fromkeys(keys))
+
+
+# 鍵的產生方式改變時遞增，開啟舊版本的目錄時以保存的歌名/歌手重建所有鍵
+KEY_VERSION = 2
+
+
+class TrackCatalog:
+    """跨來源 (Melon 排行榜 / txt 文件) 共用的歌曲 → YouTube 影片目錄
+
+    每首歌以正規化後的「歌名|歌手」為標準鍵，並以別名表記錄其他寫法
+    (韓文/羅馬拼音、客串標記等)，查詢時都是主鍵查找。
+    與搜尋快取不同，目錄中的對應不會過期；refresh 為 True 時查詢一律未命中，
+    重新搜索的結果會覆蓋舊的對應，單首錯誤的對應可用 evict 刪除。
+    """
+
+    def __init__(self, db_path="track_catalog.db", refresh=False):
+        self.db_path = db_path
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS tracks ("
+            " key TEXT PRIMARY KEY,"
+            " name TEXT NOT NULL,"
+            " artist TEXT NOT NULL,"
+            " video_id TEXT NOT NULL,"
+            " title TEXT,"
+            " confidence REAL,"
+            " duration REAL,"
+            " updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS aliases ("
+            " alias TEXT PRIMARY KEY,"
+            " key TEXT NOT NULL REFERENCES tracks (key));"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tracks)")]
+        if 'duration' not in columns:
+            # 舊版本的目錄沒有影片長度，有長度篩選時這些對應會重新搜索
+            self._conn.execute("ALTER TABLE tracks ADD COLUMN duration REAL")
+        self._conn.commit()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+            self._rekey()
+
+    def _rekey(self):
+        """以目前的正規化規則重建鍵與別名 (舊版本把 Inst./Remix 等版本與原曲視為同一首)"""
+        rows = self._conn.execute(
+            "SELECT name, artist, video_id, title, confidence, duration, updated_at FROM tracks"
+            " ORDER BY updated_at"
+        ).fetchall()
+        self._conn.execute("DELETE FROM aliases")
+        self._conn.execute("DELETE FROM tracks")
+        for name, artist, video_id, title, confidence, duration, updated_at in rows:
+            keys = track_keys(name, artist)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tracks"
+                " (key, name, artist, video_id, title, confidence, duration, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (keys[0], name, artist, video_id, title, confidence, duration, updated_at)
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO aliases (alias, key) VALUES (?, ?)",
+                [(alias, keys[0]) for alias in keys]
+            )
+        self._conn.execute(f"PRAGMA user_version = {KEY_VERSION}")
+        self._conn.commit()
+
+    def lookup(self, track):
+        """查詢歌曲，找到時回傳 {'video_id', 'title', 'confidence', 'duration', 'key'}，否則回傳 None"""
+        with self._lock:
+            for alias in [] if self.refresh else track_keys(track['name'], track['artist']):
+                row = self._find(alias)
+                if row:
+                    self.hits += 1
+                    metrics.cache_result('catalog', True)
+                    return {'key': row[0], 'video_id': row[1], 'title': row[2],
+                            'confidence': row[3], 'duration': row[4]}
+            self.misses += 1
+            metrics.cache_result('catalog', False)
+            return None
+
+    def _find(self, alias):
+        return self._conn.execute(
+            "SELECT t.key, t.video_id, t.title, t.confidence, t.duration FROM aliases a"
+            " JOIN tracks t ON t.key = a.key WHERE a.alias = ?",
+            (alias,)
+        ).fetchone()
+
+    def add(self, track, video_id, title=None, confidence=None, duration=None):
+        """記錄歌曲對應的影片，並登記所有別名"""
+        if not track.get('artist') or not video_id:
+            return
+        keys = track_keys(track['name'], track['artist'])
+        with self._lock:
+            # 已有別名對應到既有歌曲時沿用該歌曲的標準鍵
+            key = keys[0]
+            for alias in keys:
+                row = self._conn.execute("SELECT key FROM aliases WHERE alias = ?", (alias,)).fetchone()
+                if row:
+                    key = row[0]
+                    break
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tracks"
+                " (key, name, artist, video_id, title, confidence, duration, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, track['name'], track['artist'], video_id, title, confidence, duration,
+                 time.time())
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO aliases (alias, key) VALUES (?, ?)",
+                [(alias, key) for alias in keys]
+            )
+            self._conn.commit()
+
+    def evict(self, track):
+        """刪除歌曲的對應與所有別名 (之後會重新搜索)，回傳被刪除的對應或 None"""
+        with self._lock:
+            for alias in track_keys(track['name'], track['artist']):
+                row = self._find(alias)
+                if row:
+                    self._conn.execute("DELETE FROM aliases WHERE key = ?", (row[0],))
+                    self._conn.execute("DELETE FROM tracks WHERE key = ?", (row[0],))
+                    self._conn.commit()
+                    return {'key': row[0], 'video_id': row[1], 'title': row[2],
+                            'confidence': row[3], 'duration': row[4]}
+            return None
+
+    def print_stats(self):
+        print(f"曲目目錄: 命中 {self.hits} / 未命中 {self.misses}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='查詢曲目目錄中歌曲對應的影片，或刪除錯誤的對應')
+    parser.add_argument('name', help='歌名')
+    parser.add_argument('artist', help='歌手')
+    parser.add_argument('--catalog-file', default='track_catalog.db',
+                        help='曲目目錄檔案 (預設: track_catalog.db)')
+    parser.add_argument('--evict', action='store_true',
+                        help='刪除這首歌的對應 (下次遇到時重新搜索)')
+    args = parser.parse_args()
+
+    catalog = TrackCatalog(args.catalog_file)
+    try:
+        track = {'name': args.name, 'artist': args.artist}
+        entry = catalog.evict(track) if args.evict else catalog.lookup(track)
+        if entry is None:
+            print(f"曲目目錄中沒有這首歌: {args.name} - {args.artist}")
+            return
+        confidence = f"{entry['confidence']:.2f}" if entry['confidence'] is not None else "無"
+        action = "已刪除" if args.evict else "對應到"
+        print(f"{action}: {entry['title']} (ID: {entry['video_id']}, 信心 {confidence})")
+    finally:
+        catalog.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import re
+from itertools import chain, islice
+
+COLUMN_ORDERS = ['auto', 'artist-title', 'title-artist']
+# 自動判斷欄位順序時取樣的行數
+SAMPLE_LINES = 200
+
+DASHES = '-\u2010\u2012\u2013\u2014\u2015'
+# 行首編號 "12. " 或 "12) " ("12→" 另外處理)
+NUMBERING_RE = re.compile(r"\d+[.)]\s+")
+# 有空白包圍的分隔符優先於沒有空白的 (例如 "K-pop - 歌手")
+SPACED_SEPARATOR_RE = re.compile(r"\s[{}]\s".format(DASHES))
+SEPARATOR_RE = re.compile(r"[{}]".format(DASHES))
+TITLE_HINT_RE = re.compile(
+    r"[(\[](?:feat|ft\.|prod|with |inst|remix|ver|live|acoustic|ost|edit|mix)|\bremix\b",
+    re.IGNORECASE)
+ARTIST_HINT_RE = re.compile(r"/|,|&| x |^[^()]+ \([^()]+\)$", re.IGNORECASE)
+
+
+class Track:
+    """一首歌曲 (歌名、歌手、所在行號)
+
+    使用 __slots__ 減少大量曲目時的記憶體用量；
+    支援 track['name'] 與 track.get('artist') 的寫法，可直接取代原本的 dict。
+    """
+
+    __slots__ = ('name', 'artist', 'line_num')
+
+    def __init__(self, name, artist, line_num=None):
+        self.name = name
+        self.artist = artist
+        self.line_num = line_num
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __eq__(self, other):
+        if not isinstance(other, Track):
+            return NotImplemented
+        return (self.name, self.artist, self.line_num) == (other.name, other.artist, other.line_num)
+
+    def __repr__(self):
+        return f"Track({self.name!r}, {self.artist!r}, line_num={self.line_num!r})"
+
+
+def split_track_line(line):
+    """取出一行的左右兩欄 (已去除前後空白)，格式不正確時回傳 None
+
+    支援行首編號與各種破折號。大部分的行使用 " - "，以 str.partition 直接分開；
+    其他分隔符才交給預先編譯的正規表示式。
+    """
+    if '→' in line:
+        line = line.partition('→')[2]
+    elif line[:1].isdigit():
+        match = NUMBERING_RE.match(line)
+        if match:
+            line = line[match.end():]
+    left, sep, right = line.partition(' - ')
+    if not sep:
+        match = SPACED_SEPARATOR_RE.search(line) or SEPARATOR_RE.search(line)
+        if match is None:
+            return None
+        left = line[:match.start()]
+        right = line[match.end():]
+    return left.strip(), right.strip()
+
+
+def _artist_score(text):
+    """text 像歌手名的程度 (正數像歌手，負數像歌名)"""
+    score = 0
+    if TITLE_HINT_RE.search(text):
+        score -= 2
+    elif ARTIST_HINT_RE.search(text):
+        score += 2
+    return score
+
+
+def detect_column_order(pairs):
+    """由取樣的 (左欄, 右欄) 判斷欄位順序，回傳 'artist-title' 或 'title-artist'
+
+    依據: 合作標記 (/ , & x)、"歌手 (團體)" 寫法、歌名常見的 (feat. …)/(Remix) 等標記，
+    以及歌手名通常比歌名短。無法判斷時沿用原本的預設 (左歌名、右歌手)。
+    """
+    score = 0
+    for left, right in pairs:
+        score += _artist_score(left) - _artist_score(right)
+        left_words = len(left.split())
+        right_words = len(right.split())
+        if left_words != right_words:
+            score += 1 if left_words < right_words else -1
+    return 'artist-title' if score > 0 else 'title-artist'
+
+
+def iter_txt_tracks(file_path, limit=None, columns='auto'):
+    """逐行讀取 txt 文件並依序產生 Track，不會一次把整個文件讀進記憶體
+
+    columns 為 'auto' 時以文件開頭的 SAMPLE_LINES 行判斷歌手/歌名的欄位順序。
+    limit 有值時取得足夠的歌曲後就停止讀取。
+    """
+    tracks = _iter_file(file_path, columns)
+    if limit is not None:
+        tracks = islice(tracks, limit)
+    return tracks
+
+
+def _iter_file(file_path, columns):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            head = []
+            if columns == 'auto':
+                # 只在開頭取樣一次，之後每行不再判斷
+                head = list(islice(f, SAMPLE_LINES))
+                pairs = [split_track_line(line.strip()) for line in head if line.strip()]
+                columns = detect_column_order(pair for pair in pairs if pair is not None)
+            artist_first = columns == 'artist-title'
+
+            for line_num, line in enumerate(chain(head, f), 1):
+                line = line.strip()
+                if not line:
+                    continue
+                pair = split_track_line(line)
+                if pair is None:
+                    print(f"第 {line_num} 行格式不正確，跳過: {line}")
+                    continue
+                left, right = pair
+                if artist_first:
+                    yield Track(right, left, line_num)
+                else:
+                    yield Track(left, right, line_num)
+    except (OSError, UnicodeDecodeError) as e:
+        # 讀取中途出錯時停止，已產生的歌曲仍然有效
+        print(f"讀取文件出錯: {e}")
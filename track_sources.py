@@ -0,0 +1,130 @@
+import os
+from datetime import datetime
+
+from melon_scraper import scrape_melon_chart, MELON_CHART_URL
+from playlist_manifest import read_manifest
+from track_reader import iter_txt_tracks
+
+
+class MelonChartSource:
+    """Melon 排行榜 (每首歌為 "歌名 - 歌手" 字串)"""
+
+    name = "melon"
+
+    def __init__(self, url=MELON_CHART_URL, limit=None, cache=None):
+        self.url = url
+        self.limit = limit
+        self.cache = cache
+        self.index_path = os.path.join("create_yt_playlist", "melon.playlists.json")
+
+    def read(self):
+        """從Melon排行榜獲取歌曲列表"""
+        print("正在獲取 Melon 排行榜...")
+        songs = scrape_melon_chart(url=self.url, cache=self.cache)
+
+        if not songs:
+            print("無法獲取 Melon 排行榜數據")
+            return []
+
+        tracks = []
+        for song_str in songs:
+            # 解析歌曲字符串格式: "歌名 - 歌手"
+            if " - " in song_str:
+                song_name, artist_name = song_str.split(" - ", 1)
+                tracks.append({
+                    'name': song_name.strip(),
+                    'artist': artist_name.strip()
+                })
+
+        print(f"成功獲取 {len(tracks)} 首歌曲")
+        if self.limit is not None and self.limit < len(tracks):
+            tracks = tracks[:self.limit]
+            print(f"限制歌曲數量為前 {self.limit} 首")
+        return tracks
+
+    def stream(self):
+        # 排行榜只有一頁，直接整個讀入
+        return iter(self.read())
+
+    def playlist_name(self):
+        return f"Melon Chart Top 100 - {datetime.now().strftime('%Y-%m-%d')}"
+
+    def description(self):
+        return f"Melon排行榜音樂播放清單 - 創建於 {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+
+
+class TxtFileSource:
+    """txt 歌曲文件 (每行一首，支援多種分隔符與格式)"""
+
+    def __init__(self, path, limit=None, columns='auto'):
+        self.path = path
+        self.name = path
+        self.limit = limit
+        self.columns = columns
+        self.index_path = path + ".playlists.json"
+
+    def read(self):
+        """從txt文件讀取歌曲列表"""
+        tracks = list(self.stream())
+        print(f"成功讀取 {len(tracks)} 首歌曲")
+        return tracks
+
+    def stream(self):
+        """逐行讀取txt文件，依序產生 Track (大型文件不需一次讀入記憶體)"""
+        print(f"正在讀取文件: {self.path}")
+        if not os.path.exists(self.path):
+            print(f"文件不存在: {self.path}")
+            return iter(())
+        return iter_txt_tracks(self.path, self.limit, self.columns)
+
+    def playlist_name(self):
+        file_name = os.path.basename(self.path).replace('.txt', '')
+        return f"{file_name} - {datetime.now().strftime('%Y-%m-%d')}"
+
+    def description(self):
+        return f"從 {self.path} 創建的播放清單 - 創建於 {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+
+
+class ManifestSource:
+    """之前匯出的清單檔 (每首歌已有 video_id，建立播放清單時不需要搜索)"""
+
+    def __init__(self, path, limit=None):
+        self.path = path
+        self.name = path
+        self.limit = limit
+        self.info = {}
+        self.index_path = path + ".playlists.json"
+
+    def read(self):
+        """從清單檔讀取有影片或上次失敗 (需要重新搜索) 的歌曲"""
+        print(f"正在讀取清單檔: {self.path}")
+        try:
+            self.info, rows = read_manifest(self.path)
+        except (OSError, ValueError) as e:
+            print(f"清單檔讀取失敗: {e}")
+            return []
+
+        tracks = [{'name': row['name'], 'artist': row['artist'], 'line_num': row['line'],
+                   'video_id': row['video_id'], 'confidence': row['confidence'],
+                   'status': row['status']}
+                  for row in rows if row['video_id'] or row['status'] == 'failed']
+        if len(tracks) < len(rows):
+            print(f"略過 {len(rows) - len(tracks)} 首沒有影片的歌曲")
+        retry_count = sum(1 for track in tracks if track['status'] == 'failed')
+        if retry_count:
+            print(f"{retry_count} 首上次失敗的歌曲會重新搜索")
+        print(f"成功讀取 {len(tracks)} 首歌曲")
+        if self.limit is not None and self.limit < len(tracks):
+            tracks = tracks[:self.limit]
+            print(f"限制歌曲數量為前 {self.limit} 首")
+        return tracks
+
+    def stream(self):
+        return iter(self.read())
+
+    def playlist_name(self):
+        name = self.info.get('playlist_name') or os.path.splitext(os.path.basename(self.path))[0]
+        return f"{name} - {datetime.now().strftime('%Y-%m-%d')}"
+
+    def description(self):
+        return f"從清單檔 {os.path.basename(self.path)} 創建的播放清單 - 創建於 {datetime.now().strftime('%Y-%m-%d %H:%M')}"
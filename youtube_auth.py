@@ -0,0 +1,73 @@
+import os
+
+from search_pipeline import thread_local_request_builder
+
+SCOPES = ["https://www.googleapis.com/auth/youtube.force-ssl"]
+
+
+def load_credentials(client_secrets_file, token_file):
+    """取得 OAuth 憑證
+
+    優先使用 token_file 中保存的憑證，過期時以 refresh token 自動更新，
+    只有在沒有可用憑證時才開啟瀏覽器授權，並把新憑證寫回 token_file。
+    """
+    # google 認證相關套件載入很慢，只在需要授權時才載入
+    from google.auth.exceptions import RefreshError
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
+    credentials = None
+    if os.path.exists(token_file):
+        try:
+            credentials = Credentials.from_authorized_user_file(token_file, SCOPES)
+        except ValueError as e:
+            print(f"憑證檔案格式錯誤，將重新授權: {e}")
+
+    if credentials and credentials.valid:
+        return credentials
+
+    if credentials and credentials.expired and credentials.refresh_token:
+        try:
+            credentials.refresh(Request())
+            save_credentials(credentials, token_file)
+            return credentials
+        except RefreshError as e:
+            print(f"憑證更新失敗，將重新授權: {e}")
+
+    import google_auth_oauthlib.flow
+    flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
+        client_secrets_file, SCOPES)
+    credentials = flow.run_local_server(port=0)
+    save_credentials(credentials, token_file)
+    return credentials
+
+
+def save_credentials(credentials, token_file):
+    """以原子寫入保存憑證，並限制只有擁有者可讀取"""
+    directory = os.path.dirname(token_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_file = token_file + '.tmp'
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(credentials.to_json())
+    os.replace(tmp_file, token_file)
+
+
+def build_youtube_client(credentials, discovery_url=None):
+    """建立 YouTube Data API 客戶端
+
+    使用 googleapiclient 內建的靜態 discovery 文件，不需要先從網路下載。
+    指定 discovery_url 時改從該網址讀取 (例如 benchmarks 中的本機替身伺服器)。
+    """
+    import googleapiclient.discovery
+
+    if discovery_url:
+        return googleapiclient.discovery.build(
+            "youtube", "v3", credentials=credentials,
+            requestBuilder=thread_local_request_builder(credentials),
+            discoveryServiceUrl=discovery_url, static_discovery=False, cache_discovery=False)
+    return googleapiclient.discovery.build(
+        "youtube", "v3", credentials=credentials,
+        requestBuilder=thread_local_request_builder(credentials),
+        static_discovery=True)
@@ -0,0 +1,72 @@
+import importlib.util
+import queue
+import threading
+
+YTDLP_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "extract_flat": True,
+}
+
+
+class YtDlpSearchEngine:
+    """可重複使用的 yt-dlp 搜尋引擎 (不消耗 YouTube Data API 配額)
+
+    保留最多 pool_size 個 YoutubeDL 實例重複使用，避免每次搜尋都重新初始化
+    extractor；每個實例同一時間只會被一個執行緒使用。
+    """
+
+    def __init__(self, pool_size=2):
+        self.pool_size = max(1, pool_size)
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        # 只檢查是否已安裝，yt_dlp (與其龐大的 extractor 清單) 到第一次搜尋時才載入
+        return importlib.util.find_spec("yt_dlp") is not None
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                import yt_dlp
+                self._created += 1
+                return yt_dlp.YoutubeDL(YTDLP_OPTIONS)
+        return self._pool.get()
+
+    def search(self, query, count=1):
+        """搜尋 query，回傳最多 count 個候選影片
+
+        每個候選為 {'id', 'title', 'channel', 'duration'} (duration 可能為 None)。
+        """
+        if not self.available:
+            raise ImportError("未安裝 yt-dlp，請先執行: pip install yt-dlp")
+        ydl = self._acquire()
+        try:
+            result = ydl.extract_info(f"ytsearch{count}:{query}", download=False)
+        finally:
+            self._pool.put(ydl)
+
+        candidates = []
+        for entry in (result or {}).get("entries") or []:
+            if entry and entry.get("id"):
+                candidates.append({
+                    'id': entry["id"],
+                    'title': entry.get("title") or "",
+                    'channel': entry.get("channel") or entry.get("uploader") or "",
+                    'duration': entry.get("duration"),
+                })
+        return candidates
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break